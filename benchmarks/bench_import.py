@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入和列表页基准测试
+
+对每个数据规模，用 synthetic_data 生成测试文件，在临时SQLite数据库上依次计时:
+- 各导入程序: 首次导入、内容不变时的重复导入、全量重新导入（影子表）
+- 各列表页: 第一页、中间页（页码分页）、游标分页第一页
+
+结果保存为 benchmarks/results/<提交>.json，可用 --compare 对比两次结果。
+
+用法:
+    python benchmarks/bench_import.py --sizes 10000,100000,1000000
+    python benchmarks/bench_import.py --compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+sys.path.append(os.path.join(REPO_DIR, 'src'))
+
+# 列表页: (名称, 路径)
+LIST_ROUTES = [
+    ('dragontiger', '/dragontiger'),
+    ('wencai', '/wencai'),
+    ('quant', '/quant'),
+    ('jiuyan_news', '/jiuyan_news'),
+]
+PER_PAGE = 20
+
+
+def git_revision():
+    """当前提交的短哈希，工作区有未提交修改时加 -dirty 后缀"""
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def timed(func):
+    """执行并返回 (结果, 秒数)"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def time_request(client, url, repeat):
+    """多次请求取中位数，返回毫秒"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} 返回 {response.status_code}")
+    return statistics.median(timings)
+
+
+def bench_size(rows, stocks, work_dir, repeat):
+    """在一个数据规模上运行全部测试"""
+    from app import app
+    from models import db
+    from synthetic_data import SyntheticData, DRAGONTIGER_CSV, WENCAI_CSV, QUANT_CSV, NEWS_JSON
+    from data_import import (import_dragontiger_data, import_jiuyan_news_data,
+                             import_wencai_csv, import_quant_csv)
+
+    data = SyntheticData.for_rows(rows, stocks)
+    data_dir = os.path.join(work_dir, f"data_{rows}")
+    paths, generate_seconds = timed(lambda: data.write_all(data_dir))
+    print(f"\n=== {data.rows} 行/表（{data.days} 天 × {data.stocks} 只股票），生成数据 {generate_seconds:.1f} 秒 ===")
+
+    importers = [
+        ('dragontiger', lambda: import_dragontiger_data(paths[DRAGONTIGER_CSV], force=True)),
+        ('dragontiger_unchanged', lambda: import_dragontiger_data(paths[DRAGONTIGER_CSV], force=True)),
+        ('dragontiger_full_reload', lambda: import_dragontiger_data(paths[DRAGONTIGER_CSV], full_reload=True)),
+        ('jiuyan_news', lambda: import_jiuyan_news_data(paths[NEWS_JSON], force=True)),
+        ('jiuyan_news_unchanged', lambda: import_jiuyan_news_data(paths[NEWS_JSON], force=True)),
+        ('jiuyan_news_full_reload', lambda: import_jiuyan_news_data(paths[NEWS_JSON], full_reload=True)),
+        ('wencai', lambda: import_wencai_csv(paths[WENCAI_CSV], force=True)),
+        ('quant', lambda: import_quant_csv(paths[QUANT_CSV], force=True)),
+    ]
+
+    result = {'days': data.days, 'stocks': data.stocks, 'rows': data.rows,
+              'generate_seconds': round(generate_seconds, 3), 'imports': {}, 'routes': {}}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for name, func in importers:
+            ok, seconds = timed(func)
+            result['imports'][name] = {
+                'seconds': round(seconds, 3) if ok else None,
+                'rows_per_second': round(data.rows / seconds) if ok and seconds > 0 else None,
+            }
+
+    client = app.test_client()
+    middle_page = max(1, math.ceil(data.rows / PER_PAGE) // 2)
+    for name, path in LIST_ROUTES:
+        for variant, url in [('first_page', path), ('middle_page', f"{path}?page={middle_page}"),
+                             ('cursor_first_page', f"{path}?cursor=")]:
+            result['routes'][f"{name}.{variant}"] = round(time_request(client, url, repeat), 2)
+
+    print(f"{'导入':<28}{'秒':>10}{'行/秒':>12}")
+    for name, item in result['imports'].items():
+        seconds = f"{item['seconds']:.3f}" if item['seconds'] is not None else '失败'
+        print(f"{name:<28}{seconds:>10}{item['rows_per_second'] or '':>12}")
+    print(f"{'列表页':<34}{'毫秒':>10}")
+    for name, ms in result['routes'].items():
+        print(f"{name:<34}{ms:>10.2f}")
+    return result
+
+
+def run(sizes, stocks, repeat, output):
+    with tempfile.TemporaryDirectory() as work_dir:
+        # 导入 app 之前指定临时数据库并关闭页面缓存
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+        os.environ['PAGE_CACHE_SIZE'] = '0'
+
+        results = {
+            'revision': git_revision(),
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'sizes': {},
+        }
+        for rows in sizes:
+            results['sizes'][str(rows)] = bench_size(rows, stocks, work_dir, repeat)
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{results['revision']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+
+def compare(old_path, new_path):
+    """对比两次结果，比值小于1表示新结果更快"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"对比 {old['revision']} -> {new['revision']}")
+
+    for size, new_result in new['sizes'].items():
+        old_result = old['sizes'].get(size)
+        if old_result is None:
+            continue
+        print(f"\n=== {size} 行/表 ===")
+        print(f"{'指标':<40}{'旧':>12}{'新':>12}{'比值':>8}")
+        metrics = [(f"导入 {name} (秒)", old_result['imports'].get(name, {}).get('seconds'), item['seconds'])
+                   for name, item in new_result['imports'].items()]
+        metrics += [(f"页面 {name} (毫秒)", old_result['routes'].get(name), ms)
+                    for name, ms in new_result['routes'].items()]
+        for name, old_value, new_value in metrics:
+            if old_value and new_value:
+                print(f"{name:<40}{old_value:>12.3f}{new_value:>12.3f}{new_value / old_value:>8.2f}")
+            else:
+                print(f"{name:<40}{str(old_value):>12}{str(new_value):>12}{'':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导入和列表页基准测试')
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='每张表的行数，逗号分隔（例如 10000,100000,1000000）')
+    parser.add_argument('--stocks', type=int, default=100, help='每天的股票数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个页面请求的次数（取中位数）')
+    parser.add_argument('--output', help='结果文件路径，默认 benchmarks/results/<提交>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两个结果文件')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    run(sizes, args.stocks, args.repeat, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+索引前后的查询计划对比
+
+在临时SQLite数据库中生成测试数据，先删除模型声明的索引，
+对应用中的各个查询执行 EXPLAIN QUERY PLAN 并计时；
+再执行结构升级（创建索引），重复一遍，输出对比结果。
+
+用法:
+    python benchmarks/query_plans.py --rows 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from flask import Flask
+from sqlalchemy import inspect, insert, select
+
+from models import db, DragonTiger, JiuYan, WenCai, QuantData, JiuYanNews
+from migrations import upgrade_schema
+from pagination import _seek_condition
+
+
+def build_app(db_path):
+    """创建只用于基准测试的Flask应用"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def populate(rows):
+    """生成测试数据"""
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    days = max(1, rows // 30)
+    strategies = ["均线突破策略", "布林带策略", "MACD金叉策略", "RSI超卖策略", "动量策略"]
+
+    dragon_rows = []
+    news_rows = []
+    quant_rows = []
+    wencai_rows = []
+    jiuyan_rows = []
+    for i in range(rows):
+        day = start + timedelta(days=i % days)
+        code = f"{rng.randint(1, 4000):06d}"
+        dragon_rows.append({
+            'rank': i // days % 30 + 1, 'date': day, 'stock_code': code, 'stock_name': '测试',
+            'buyers': '机构专用', 'change_percent': 10.0, 'net_buy_amount': 100000000.0,
+        })
+        news_rows.append({
+            'news_date': day, 'news_time': f"{rng.randint(9, 15):02d}:{rng.randint(0, 59):02d}:00",
+            'stock_codes': code, 'stock_names': '测试', 'news_content': '内容', 'news_summary': '简介',
+        })
+        quant_rows.append({
+            'date': day, 'stock_code': code, 'stock_name': '测试', 'strategy_name': rng.choice(strategies),
+            'signal': '买入', 'confidence': 0.8,
+        })
+        wencai_rows.append({
+            'date': day, 'stock_code': code, 'stock_name': '测试', 'indicator_name': '市盈率',
+            'indicator_value': 10.0,
+        })
+        jiuyan_rows.append({
+            'date': day, 'stock_code': code, 'stock_name': '测试', 'price': 10.0, 'change_percent': 1.0,
+            'volume': 1000, 'market_value': 1e9,
+        })
+
+    for model, data in [(DragonTiger, dragon_rows), (JiuYanNews, news_rows), (QuantData, quant_rows),
+                        (WenCai, wencai_rows), (JiuYan, jiuyan_rows)]:
+        db.session.execute(insert(model), data)
+    db.session.commit()
+    return start + timedelta(days=days - 1)
+
+
+# 与 app.py 中的龙虎榜排序键一致
+DRAGONTIGER_ORDER = [(DragonTiger.date, True), (DragonTiger.rank, False), (DragonTiger.id, False)]
+
+
+def benchmark_queries(last_day):
+    """应用中的主要查询: (名称, 语句)"""
+    return [
+        ("龙虎榜列表页", select(DragonTiger)
+         .order_by(DragonTiger.date.desc(), DragonTiger.rank.asc(), DragonTiger.id.asc()).limit(20)),
+        ("龙虎榜游标翻页", select(DragonTiger)
+         .where(_seek_condition(DRAGONTIGER_ORDER, [last_day - timedelta(days=100), 10, 1], True))
+         .order_by(DragonTiger.date.desc(), DragonTiger.rank.asc(), DragonTiger.id.asc()).limit(21)),
+        ("按股票查询龙虎榜", select(DragonTiger)
+         .where(DragonTiger.stock_code == '000001').order_by(DragonTiger.date.desc())),
+        ("新闻列表页", select(JiuYanNews)
+         .order_by(JiuYanNews.news_date.desc(), JiuYanNews.news_time.desc(), JiuYanNews.id.desc()).limit(20)),
+        ("按策略查询量化信号", select(QuantData)
+         .where(QuantData.strategy_name == '动量策略').order_by(QuantData.date.desc()).limit(20)),
+        ("量化列表页", select(QuantData).order_by(QuantData.date.desc(), QuantData.id.desc()).limit(20)),
+        ("i问财列表页", select(WenCai).order_by(WenCai.date.desc(), WenCai.id.desc()).limit(20)),
+        ("模拟导入的当日检查", select(JiuYan).where(JiuYan.date == last_day).limit(1)),
+    ]
+
+
+def explain(stmt):
+    """返回 (查询计划, 平均耗时毫秒)"""
+    compiled = stmt.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    processors = compiled._bind_processors
+    params = tuple(processors[name](value) if name in processors else value
+                   for name, value in zip(compiled.positiontup, params))
+
+    with db.engine.connect() as conn:
+        plan_rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params).fetchall()
+        plan = " | ".join(row[-1] for row in plan_rows)
+
+        repeat = 5
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.exec_driver_sql(compiled.string, params).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+    return plan, elapsed
+
+
+def drop_model_indexes():
+    """删除模型声明的索引，模拟升级前的数据库"""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                index.drop(bind=db.engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='索引前后的查询计划对比')
+    parser.add_argument('--rows', type=int, default=100000, help='每张表的测试数据行数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = build_app(os.path.join(tmp_dir, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            drop_model_indexes()
+            print(f"生成测试数据，每张表 {args.rows} 行...")
+            last_day = populate(args.rows)
+
+            queries = benchmark_queries(last_day)
+            before = [explain(stmt) for _, stmt in queries]
+
+            upgrade_schema()
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql("ANALYZE")
+            after = [explain(stmt) for _, stmt in queries]
+
+            for (name, _), (plan_before, ms_before), (plan_after, ms_after) in zip(queries, before, after):
+                print(f"\n=== {name} ===")
+                print(f"  升级前: {ms_before:8.2f} ms  {plan_before}")
+                print(f"  升级后: {ms_after:8.2f} ms  {plan_after}")
+
+
+if __name__ == "__main__":
+    main()
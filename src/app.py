@@ -1,12 +1,21 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 import os
 import sys
+from sqlalchemy import Integer, cast, func
 
 # 添加src目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models import db, DragonTiger, JiuYan, WenCai, QuantData, JiuYanNews
+from models import db, DragonTiger, JiuYan, WenCai, QuantData, JiuYanNews, DRAGONTIGER_CATEGORIES
 from data_import import import_dragontiger_data, import_jiuyan_data, import_wencai_data, import_quant_data, import_jiuyan_news_data
+from pagination import keyset_paginate, offset_paginate
+from table_stats import get_row_count
+from page_cache import PageCache, conditional_get
+from read_api import read_api
+from jobs import JobRunner
+from get_stock_data import DailyCrawl
+from migrations import upgrade_schema
+from number_format import format_percent, format_amount
 
 app = Flask(__name__)
 
@@ -24,23 +33,69 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stock.db'
     app.config['DEBUG'] = True
 
+# 可通过环境变量指定数据库（例如基准测试使用的临时数据库）
+if os.environ.get('DATABASE_URL'):
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # 初始化数据库
 db.init_app(app)
 
+# 模板中的数值格式化
+app.jinja_env.filters['format_percent'] = format_percent
+app.jinja_env.filters['format_amount'] = format_amount
+app.jinja_env.filters['lhb_category'] = lambda category: DRAGONTIGER_CATEGORIES.get(category, category)
+
+# 只读数据接口（/api/...）
+app.register_blueprint(read_api)
+
+# 后台任务执行器（爬虫和导入不在请求中同步执行）
+job_runner = JobRunner(app)
+
+# 列表页渲染结果缓存（容量和过期秒数可通过环境变量调整，容量为0表示关闭）
+page_cache = PageCache(maxsize=int(os.environ.get('PAGE_CACHE_SIZE', 256)),
+                       ttl=int(os.environ.get('PAGE_CACHE_TTL', 300)))
+
+# 各列表页的排序键（游标分页要求最后一列唯一）
+DRAGONTIGER_ORDER = [(DragonTiger.date, True), (DragonTiger.rank, False), (DragonTiger.id, False)]
+WENCAI_ORDER = [(WenCai.date, True), (WenCai.id, True)]
+QUANT_ORDER = [(QuantData.date, True), (QuantData.id, True)]
+JIUYAN_NEWS_ORDER = [(JiuYanNews.news_date, True), (JiuYanNews.news_time, True), (JiuYanNews.id, True)]
+
+# 量化页面的置信度百分比（SQL表达式）
+QUANT_CONFIDENCE_PERCENT = cast(func.round(QuantData.confidence * 100), Integer).label('confidence_percent')
+
+
+def order_clauses(order_keys):
+    """把排序键转换为order_by子句"""
+    return [column.desc() if descending else column.asc() for column, descending in order_keys]
+
+
+def paginate_list(model, query, order_keys, per_page):
+    """列表页分页：请求带cursor参数时使用游标分页，否则使用页码分页
+
+    页码分页的总行数读取导入时维护的统计表，不执行 COUNT(*)。
+    页码分页的上一页/下一页链接带当前页首尾行的游标，连续翻页都走游标分页。
+    """
+    if 'cursor' in request.args:
+        return keyset_paginate(query, order_keys, request.args.get('cursor'), per_page)
+    page = request.args.get('page', 1, type=int)
+    return offset_paginate(query.order_by(*order_clauses(order_keys)), page, per_page,
+                           get_row_count(model), order_keys)
+
 @app.route('/')
 def index():
     """首页路由"""
     return render_template('index.html')
 
 @app.route('/dragontiger')
+@conditional_get('dragon_tiger')
+@page_cache.cached('dragon_tiger')
 def dragontiger():
     """龙虎榜数据页面"""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
-    dragontiger_data = DragonTiger.query.order_by(DragonTiger.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False)
+    dragontiger_data = paginate_list(DragonTiger, DragonTiger.query, DRAGONTIGER_ORDER, per_page)
     return render_template('dragontiger.html', data=dragontiger_data)
 
 @app.route('/jiuyan')
@@ -49,80 +104,44 @@ def jiuyan():
     return redirect(url_for('jiuyan_news'))
 
 @app.route('/wencai')
+@conditional_get('wen_cai')
+@page_cache.cached('wen_cai')
 def wencai():
     """i问财数据页面"""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
-    wencai_data = WenCai.query.order_by(WenCai.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False)
+    wencai_data = paginate_list(WenCai, WenCai.query, WENCAI_ORDER, per_page)
     return render_template('wencai.html', data=wencai_data)
 
 @app.route('/quant')
+@conditional_get('quant_data')
+@page_cache.cached('quant_data')
 def quant():
     """量化分析数据页面"""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
-    quant_data = QuantData.query.order_by(QuantData.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False)
-    
-    # 预先计算置信度百分比，避免在模板中使用复杂表达式
-    processed_items = []
-    for item in quant_data.items:
-        processed_item = {
-            'id': item.id,
-            'date': item.date,
-            'stock_code': item.stock_code,
-            'stock_name': item.stock_name,
-            'strategy_name': item.strategy_name,
-            'signal': item.signal,
-            'confidence': item.confidence,
-            'confidence_percent': round(item.confidence * 100),
-            'target_price': item.target_price,
-            'stop_loss': item.stop_loss,
-            'period': item.period
-        }
-        processed_items.append(processed_item)
-    
-    # 创建一个简单的分页对象替代方案
-    class SimplePagination:
-        def __init__(self, items, page, per_page, total):
-            self.items = items
-            self.page = page
-            self.per_page = per_page
-            self.total = total
-            self.pages = (total + per_page - 1) // per_page
-            self.has_prev = page > 1
-            self.has_next = page < self.pages
-            self.prev_num = page - 1 if self.has_prev else None
-            self.next_num = page + 1 if self.has_next else None
-            
-        def iter_pages(self, left_edge=2, left_current=2, right_current=5, right_edge=2):
-            last = 0
-            for num in range(1, self.pages + 1):
-                if num <= left_edge or \
-                   (num > self.page - left_current - 1 and num < self.page + right_current) or \
-                   num > self.pages - right_edge:
-                    if last + 1 != num:
-                        yield None
-                    yield num
-                    last = num
-    
-    processed_pagination = SimplePagination(
-        items=processed_items,
-        page=quant_data.page,
-        per_page=quant_data.per_page,
-        total=quant_data.total
+    # 只查询模板需要的列，置信度百分比在SQL中计算
+    query = db.session.query(
+        QuantData.id,
+        QuantData.date,
+        QuantData.stock_code,
+        QuantData.stock_name,
+        QuantData.strategy_name,
+        QuantData.signal,
+        QuantData.confidence,
+        QUANT_CONFIDENCE_PERCENT,
+        QuantData.target_price,
+        QuantData.stop_loss,
+        QuantData.period,
     )
-    
-    return render_template('quant.html', data=processed_pagination)
+    quant_data = paginate_list(QuantData, query, QUANT_ORDER, per_page)
+    return render_template('quant.html', data=quant_data)
 
 @app.route('/jiuyan_news')
+@conditional_get('jiu_yan_news')
+@page_cache.cached('jiu_yan_news')
 def jiuyan_news():
     """韭研公社新闻数据页面"""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
-    jiuyan_news_data = JiuYanNews.query.order_by(JiuYanNews.news_date.desc(), JiuYanNews.news_time.desc()).paginate(
-        page=page, per_page=per_page, error_out=False)
+    jiuyan_news_data = paginate_list(JiuYanNews, JiuYanNews.query, JIUYAN_NEWS_ORDER, per_page)
     return render_template('jiuyan_news.html', data=jiuyan_news_data)
 
 @app.route('/import_data')
@@ -130,7 +149,8 @@ def import_data():
     """导入数据路由（模拟）"""
     # 这里应该是实际的数据导入逻辑
     # 暂时用模拟数据演示
-    import_dragontiger_data()
+    # ?full_reload=1 时全量重新导入龙虎榜数据（写入影子表后替换）
+    import_dragontiger_data(full_reload=request.args.get('full_reload') == '1')
     import_jiuyan_data()
     import_wencai_data()
     import_quant_data()
@@ -138,8 +158,8 @@ def import_data():
 
 @app.route('/import_jiuyan_news')
 def import_jiuyan_news():
-    """导入韭研公社新闻数据"""
-    result = import_jiuyan_news_data()
+    """导入韭研公社新闻数据，?full_reload=1 时全量重新导入"""
+    result = import_jiuyan_news_data(full_reload=request.args.get('full_reload') == '1')
     if result:
         return "韭研公社新闻数据导入完成"
     else:
@@ -147,64 +167,30 @@ def import_jiuyan_news():
 
 @app.route('/import_today_data')
 def import_today_data():
-    """导入今日数据 - 运行爬虫并导入最新数据"""
-    import subprocess
-    import sys
-    import os
-    
-    # 获取当前脚本目录
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+    """导入今日数据 - 在后台运行爬虫并导入最新数据，立即返回任务ID"""
+    # 爬虫在同一进程中运行，龙虎榜和新闻并行爬取，爬取结果直接导入数据库
+    job, created = job_runner.submit('import_today_data', DailyCrawl().stages(import_db=True))
+    if created:
+        print(f"已提交今日数据导入任务: {job.id}")
+    else:
+        print(f"今日数据导入任务正在运行，合并到任务: {job.id}")
     
-    try:
-        # 1. 运行爬虫程序获取最新数据
-        print("开始运行爬虫程序获取最新数据...")
-        result = subprocess.run([sys.executable, "get_stock_data.py"], 
-                              cwd=script_dir, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"爬虫程序运行失败: {result.stderr}")
-            return "爬虫程序运行失败，请检查爬虫脚本"
-        
-        print("爬虫程序运行成功，开始导入数据...")
-        
-        # 2. 导入龙虎榜数据
-        try:
-            import_dragontiger_data()
-            print("龙虎榜数据导入成功")
-        except Exception as e:
-            print(f"龙虎榜数据导入失败: {e}")
-        
-        # 3. 导入韭研公社新闻数据
-        try:
-            import_jiuyan_news_data()
-            print("韭研公社新闻数据导入成功")
-        except Exception as e:
-            print(f"韭研公社新闻数据导入失败: {e}")
-        
-        # 4. 导入其他数据（可选）
-        try:
-            import_jiuyan_data()
-            print("韭研公社数据导入成功")
-        except Exception as e:
-            print(f"韭研公社数据导入失败: {e}")
-        
-        print("今日数据导入完成")
-        
-        # 返回成功页面，包含跳转链接
-        return '''
+    # 返回任务页面，轮询任务状态，完成后跳转到龙虎榜页面
+    return '''
         <!DOCTYPE html>
         <html>
         <head>
-            <title>数据导入成功</title>
+            <title>数据导入任务</title>
             <meta charset="utf-8">
             <meta name="viewport" content="width=device-width, initial-scale=1">
             <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         </head>
         <body>
             <div class="container mt-5">
-                <div class="alert alert-success" role="alert">
-                    <h4 class="alert-heading">数据导入成功！</h4>
-                    <p>今日数据已成功导入数据库，您可以查看最新数据：</p>
+                <div class="alert alert-info" role="alert" id="job-alert">
+                    <h4 class="alert-heading" id="job-title">数据导入任务已提交</h4>
+                    <p>任务ID: <code>%(job_id)s</code>，爬取和导入在后台进行，本页面会自动刷新进度。</p>
+                    <ul id="job-stages"></ul>
                     <hr>
                     <div class="d-flex gap-3">
                         <a href="/dragontiger" class="btn btn-primary">查看龙虎榜</a>
@@ -214,22 +200,50 @@ def import_today_data():
                 </div>
             </div>
             <script>
-                // 3秒后自动跳转到龙虎榜页面
-                setTimeout(function() {
-                    window.location.href = '/dragontiger';
-                }, 3000);
+                function poll() {
+                    fetch('/jobs/%(job_id)s').then(function(r) { return r.json(); }).then(function(job) {
+                        var list = document.getElementById('job-stages');
+                        list.innerHTML = '';
+                        job.stages.forEach(function(stage) {
+                            var li = document.createElement('li');
+                            li.textContent = stage.name + ': ' + stage.status +
+                                (stage.elapsed !== null ? ' (' + stage.elapsed + ' 秒)' : '');
+                            list.appendChild(li);
+                        });
+                        if (job.status === 'succeeded') {
+                            document.getElementById('job-title').textContent = '数据导入成功！';
+                            document.getElementById('job-alert').className = 'alert alert-success';
+                            // 3秒后自动跳转到龙虎榜页面
+                            setTimeout(function() { window.location.href = '/dragontiger'; }, 3000);
+                        } else if (job.status === 'partial') {
+                            document.getElementById('job-title').textContent = '数据导入部分完成: ' + job.error;
+                            document.getElementById('job-alert').className = 'alert alert-warning';
+                        } else if (job.status === 'failed') {
+                            document.getElementById('job-title').textContent = '数据导入失败: ' + job.error;
+                            document.getElementById('job-alert').className = 'alert alert-danger';
+                        } else {
+                            setTimeout(poll, 2000);
+                        }
+                    });
+                }
+                poll();
             </script>
         </body>
         </html>
-        '''
-        
-    except Exception as e:
-        print(f"导入今日数据时发生错误: {e}")
-        return f"数据导入失败: {str(e)}"
+        ''' % {'job_id': job.id}, 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """查询后台任务的进度和各阶段耗时"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': f"任务不存在: {job_id}"}), 404
+    return jsonify(job.to_dict())
 
 # 确保在Vercel环境中也能正确初始化数据库
 with app.app_context():
     db.create_all()
+    upgrade_schema()
 
 # Vercel环境检测和启动
 if __name__ == '__main__':
@@ -1,61 +1,320 @@
-from models import db, DragonTiger, JiuYan, WenCai, QuantData, JiuYanNews
+from models import (db, DragonTiger, Trader, DragonTigerTrader, JiuYan, WenCai, QuantData, JiuYanNews, NewsStock,
+                    ImportWatermark, TraderTrade)
+from table_stats import record_import
+from shadow_tables import ShadowTables
+from json_stream import JIUYAN_NEWS_FILES, first_existing, iter_json_records
+from number_format import parse_percent, parse_amount
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime, date
+from functools import lru_cache
+import hashlib
+import os
 import random
 import re
+import time
 
-def import_dragontiger_data():
-    """导入龙虎榜数据（从CSV文件）"""
+def split_trader_names(buyers):
+    """拆分买方文本，如 "T王,机构专用,欢乐海岸" -> ["T王", "机构专用", "欢乐海岸"]"""
+    names = []
+    for name in re.split(r'[,，]', buyers or ''):
+        name = name.strip()
+        if name and name != '未知' and name not in names:
+            names.append(name)
+    return names
+
+# 批量写入时每批的行数
+DEFAULT_CHUNK_SIZE = 1000
+
+# 增量导入: 唯一键列和发生变化时需要更新的列
+DRAGONTIGER_KEY = ['date', 'stock_code', 'category']
+DRAGONTIGER_FIELDS = ['rank', 'stock_name', 'buyers', 'change_percent', 'net_buy_amount']
+TRADER_TRADE_KEY = ['date', 'stock_code', 'trader_id']
+TRADER_TRADE_FIELDS = ['stock_name', 'buy_amount', 'sell_amount', 'net_buy_amount']
+NEWS_KEY = ['content_hash']
+NEWS_FIELDS = ['stock_codes', 'stock_names', 'news_summary']
+
+# 新闻发布时间中的时间部分
+NEWS_TIME_PATTERN = re.compile(r'^([01]\d|2[0-3]):[0-5]\d:[0-5]\d$')
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """解析 YYYY-MM-DD 日期，同一批数据中日期重复很多，结果会被缓存"""
+    return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+def iter_chunks(items, chunk_size):
+    """按 chunk_size 分批"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def insert_rows(model, rows):
+    """executemany 方式插入一批行，按输入顺序返回新记录的ID"""
+    result = db.session.execute(
+        insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return result.scalars().all()
+
+def upsert_rows(table, rows, key_columns, update_columns):
+    """按唯一键 INSERT ... ON CONFLICT DO UPDATE 写入一批行
+
+    table 为正式表或影子表。已存在且内容没有变化的行不会被改写。
+    返回 唯一键 -> ID 的字典，只包含新增或有变化的行。
+    """
+    columns = table.c
+    stmt = sqlite_insert(table)
+    changed = or_(*[columns[name].is_distinct_from(stmt.excluded[name]) for name in update_columns])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[columns[name] for name in key_columns],
+        set_={name: stmt.excluded[name] for name in update_columns},
+        where=changed,
+    ).returning(columns.id, *[columns[name] for name in key_columns])
+    return {tuple(row[1:]): row[0] for row in db.session.execute(stmt, rows)}
+
+def file_fingerprint(path):
+    """文件指纹（大小和修改时间）"""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+def source_unchanged(path, fingerprint):
+    """源文件自上次导入后是否没有变化"""
+    watermark = db.session.get(ImportWatermark, os.path.basename(path))
+    return watermark is not None and watermark.fingerprint == fingerprint
+
+def record_watermark(path, fingerprint, max_date):
+    """在当前事务中记录数据源的导入水位，由调用方负责提交"""
+    source = os.path.basename(path)
+    watermark = db.session.get(ImportWatermark, source)
+    if watermark is None:
+        watermark = ImportWatermark(source=source)
+        db.session.add(watermark)
+    watermark.fingerprint = fingerprint
+    if max_date is not None and (watermark.max_date is None or max_date > watermark.max_date):
+        watermark.max_date = max_date
+    watermark.imported_at = datetime.utcnow()
+    return watermark
+
+def import_targets(models, full_reload):
+    """导入写入的目标表: 增量导入直接写正式表，全量重新导入写影子表
+
+    返回 (ShadowTables 或 None, 模型 -> 表 的字典)
+    """
+    if not full_reload:
+        return None, {model: model.__table__ for model in models}
+    shadow = ShadowTables(models)
+    shadow.create()
+    return shadow, {model: shadow[model] for model in models}
+
+def finish_import(shadow, model, changed_count, path, fingerprint, max_date, before_commit=None):
+    """提交导入：全量重新导入时先提交影子表，再在同一事务中替换正式表、刷新统计和导入水位
+
+    before_commit 为需要与正式表的变化一起提交的其他写入（全量重新导入时在替换之后执行）。
+    """
+    if shadow is not None:
+        db.session.commit()
+        shadow.swap(db.session.connection())
+    if before_commit is not None:
+        before_commit()
+    if changed_count or shadow is not None:
+        record_import(model)
+    record_watermark(path, fingerprint, max_date)
+    db.session.commit()
+
+def report_import(label, record_count, started, changed_count):
+    """输出导入行数和速度"""
+    elapsed = time.perf_counter() - started
+    speed = record_count / elapsed if elapsed > 0 else 0
+    print(f"成功导入{label}，共 {record_count} 条记录，新增或更新 {changed_count} 条，"
+          f"耗时 {elapsed:.2f} 秒（{speed:.0f} 条/秒）")
+
+class TraderIds:
+    """买方名称 -> ID，导入中出现的新名称按批写入 trader 表"""
+
+    def __init__(self):
+        self.ids = dict(db.session.execute(select(Trader.name, Trader.id)).all())
+
+    def resolve(self, names):
+        """确保这些名称都有ID"""
+        missing = list(dict.fromkeys(name for name in names if name not in self.ids))
+        if missing:
+            new_ids = insert_rows(Trader, [{'name': name} for name in missing])
+            self.ids.update(zip(missing, new_ids))
+
+    def link_rows(self, dragon_tiger_id, buyers, data_date):
+        """生成一条龙虎榜记录的买方关联行"""
+        return [
+            {'dragon_tiger_id': dragon_tiger_id, 'trader_id': self.ids[name],
+             'position': position, 'date': data_date}
+            for position, name in enumerate(buyers)
+        ]
+
+def read_dragontiger_rows(reader):
+    """逐行解析龙虎榜CSV，返回 (记录行, 买方名称列表)，跳过格式错误的行"""
+    for row in reader:
+        # 解析日期
+        date_str = row['date']
+        try:
+            data_date = parse_date(date_str)
+        except ValueError:
+            print(f"警告: 日期格式错误: {date_str}")
+            continue
+        
+        # 解析数值（兼容旧CSV中 "10.00%"、"3.93亿" 这样的文本）
+        change_percent = parse_percent(row['change_percent'])
+        net_buy_amount = parse_amount(row['net_buy_amount'])
+        if change_percent is None or net_buy_amount is None:
+            print(f"警告: 数值格式错误: {row['change_percent']}, {row['net_buy_amount']}")
+            continue
+        
+        record = {
+            'rank': int(row['rank']),
+            'date': data_date,
+            'stock_code': row['stock_code'],
+            'stock_name': row['stock_name'],
+            'buyers': row['buyers'],
+            'change_percent': change_percent,
+            'net_buy_amount': net_buy_amount,
+            # 旧CSV没有类别列，都是游资榜数据
+            'category': row.get('category') or 'jm',
+        }
+        yield record, split_trader_names(row['buyers'])
+
+def write_dragontiger_rows(rows, source, fingerprint, chunk_size=DEFAULT_CHUNK_SIZE, full_reload=False,
+                           trade_rows=None):
+    """把 (记录行, 买方名称列表) 分批写入龙虎榜表并提交，返回 (记录数, 新增或更新数)
+
+    trade_rows 为游资买卖明细行（见 write_trader_trades）时与正式表的变化在同一事务中写入，一起提交
+    （全量重新导入时在替换影子表的事务中写入，替换失败时明细也不会提交）。
+    出错时回滚并删除影子表，异常继续抛出。fingerprint 为None时按记录数和最新日期生成。
+    """
+    shadow = None
+    try:
+        shadow, tables = import_targets([DragonTiger, DragonTigerTrader], full_reload)
+        dragon_tiger_table, link_table = tables[DragonTiger], tables[DragonTigerTrader]
+        traders = TraderIds()
+        
+        record_count = 0
+        changed_count = 0
+        max_date = None
+        for chunk in iter_chunks(rows, chunk_size):
+            changed = upsert_rows(dragon_tiger_table, [record for record, _ in chunk],
+                                  DRAGONTIGER_KEY, DRAGONTIGER_FIELDS)
+            record_count += len(chunk)
+            changed_count += len(changed)
+            max_date = max([record['date'] for record, _ in chunk] + ([max_date] if max_date else []))
+            if not changed:
+                continue
+            
+            # 新增或有变化的记录重建买方关联
+            buyers = {tuple(record[column] for column in DRAGONTIGER_KEY): (record['date'], names)
+                      for record, names in chunk}
+            db.session.execute(delete(link_table)
+                               .where(link_table.c.dragon_tiger_id.in_(list(changed.values()))))
+            traders.resolve(name for key in changed for name in buyers[key][1])
+            link_rows = []
+            for key, dragon_tiger_id in changed.items():
+                data_date, names = buyers[key]
+                link_rows.extend(traders.link_rows(dragon_tiger_id, names, data_date))
+            if link_rows:
+                db.session.execute(insert(link_table), link_rows)
+        
+        trade_result = []
+        def write_trades():
+            started = time.perf_counter()
+            trade_result.append((*write_trader_trades(trade_rows, traders, chunk_size), started))
+        
+        if fingerprint is None:
+            fingerprint = f"{record_count}-{max_date}"
+        finish_import(shadow, DragonTiger, changed_count, source, fingerprint, max_date,
+                      write_trades if trade_rows is not None else None)
+        for trade_count, trade_changed, started in trade_result:
+            if trade_count:
+                report_import("游资买卖明细", trade_count, started, trade_changed)
+        return record_count, changed_count
+    except Exception:
+        db.session.rollback()
+        if shadow is not None:
+            shadow.drop()
+        raise
+
+def import_dragontiger_data(csv_file="龙虎榜数据.csv", chunk_size=DEFAULT_CHUNK_SIZE, force=False,
+                            full_reload=False):
+    """增量导入龙虎榜数据（从CSV文件）
+
+    按 (日期, 股票代码, 类别) upsert，只写入新增或有变化的记录，已有数据在导入过程中始终可读。
+    源文件自上次导入后没有变化时直接跳过，force=True 时忽略导入水位。
+    full_reload=True 时丢弃现有数据，从CSV全量重新导入（写入影子表后原子替换）。
+    """
     import csv
-    import os
-    
-    # CSV文件路径
-    csv_file = "龙虎榜数据.csv"
     
     # 检查CSV文件是否存在
     if not os.path.exists(csv_file):
         print(f"警告: 龙虎榜CSV文件 {csv_file} 不存在")
         return False
     
+    fingerprint = file_fingerprint(csv_file)
+    if not (force or full_reload) and source_unchanged(csv_file, fingerprint):
+        print(f"龙虎榜CSV文件 {csv_file} 自上次导入后没有变化，跳过导入")
+        return True
+    
     # 读取CSV文件
     try:
-        # 先清空现有数据
-        DragonTiger.query.delete()
-        db.session.commit()
-        print("已清空现有龙虎榜数据")
-        
+        started = time.perf_counter()
         with open(csv_file, 'r', encoding='utf-8-sig') as f:
             reader = csv.DictReader(f)
-            
-            record_count = 0
-            for row in reader:
-                # 解析日期
-                date_str = row['date']
-                try:
-                    data_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    print(f"警告: 日期格式错误: {date_str}")
-                    continue
-                
-                # 创建新的龙虎榜记录
-                dragon_tiger = DragonTiger(
-                    rank=int(row['rank']),
-                    date=data_date,
-                    stock_code=row['stock_code'],
-                    stock_name=row['stock_name'],
-                    buyers=row['buyers'],
-                    change_percent=row['change_percent'],
-                    net_buy_amount=row['net_buy_amount']
-                )
-                db.session.add(dragon_tiger)
-                record_count += 1
-            
-            db.session.commit()
-            print(f"成功导入龙虎榜数据，共 {record_count} 条记录")
-            return True
+            record_count, changed_count = write_dragontiger_rows(
+                read_dragontiger_rows(reader), csv_file, fingerprint, chunk_size, full_reload)
+        report_import("龙虎榜数据", record_count, started, changed_count)
+        return True
             
     except Exception as e:
         print(f"导入龙虎榜数据时出错: {e}")
-        db.session.rollback()
+        return False
+
+def write_trader_trades(rows, traders, chunk_size=DEFAULT_CHUNK_SIZE):
+    """把游资买卖明细行（trader 为游资名称）按 (日期, 股票代码, 游资) upsert，返回 (记录数, 新增或更新数)
+
+    同一只股票在多个类别中上榜时明细相同，重复的行只写入一次。不提交事务，由调用方提交或回滚。
+    """
+    unique_rows = {(row['date'], row['stock_code'], row['trader']): row for row in rows}
+    record_count = 0
+    changed_count = 0
+    for chunk in iter_chunks(unique_rows.values(), chunk_size):
+        traders.resolve(row['trader'] for row in chunk)
+        trade_rows = [
+            dict({name: row[name] for name in TRADER_TRADE_FIELDS},
+                 date=row['date'], stock_code=row['stock_code'], trader_id=traders.ids[row['trader']])
+            for row in chunk
+        ]
+        changed = upsert_rows(TraderTrade.__table__, trade_rows, TRADER_TRADE_KEY, TRADER_TRADE_FIELDS)
+        record_count += len(chunk)
+        changed_count += len(changed)
+    if changed_count:
+        record_import(TraderTrade)
+    return record_count, changed_count
+
+def import_dragontiger_records(records, source="tdx_yzlhb", chunk_size=DEFAULT_CHUNK_SIZE, full_reload=False):
+    """直接导入爬虫产生的龙虎榜记录（lhb_pipeline.LHBRecord），不经过CSV文件
+
+    数值已是百分数和元，不需要再解析；其余与 import_dragontiger_data 相同。
+    记录中的游资买卖明细与龙虎榜记录在同一事务中写入 trader_trade 表（全量重新导入时也只做增量写入）。
+    """
+    try:
+        records = list(records)
+        started = time.perf_counter()
+        rows = ((record.to_db_row(), split_trader_names(record.buyers)) for record in records)
+        trade_rows = (row for record in records for row in record.trade_rows())
+        record_count, changed_count = write_dragontiger_rows(rows, source, None, chunk_size, full_reload,
+                                                             trade_rows)
+        report_import("龙虎榜数据", record_count, started, changed_count)
+        return True
+    
+    except Exception as e:
+        print(f"导入龙虎榜数据时出错: {e}")
         return False
 
 def import_jiuyan_data():
@@ -97,6 +356,7 @@ def import_jiuyan_data():
         )
         db.session.add(jiu_yan)
     
+    record_import(JiuYan)
     db.session.commit()
 
 def import_wencai_data():
@@ -146,6 +406,7 @@ def import_wencai_data():
         )
         db.session.add(wen_cai)
     
+    record_import(WenCai)
     db.session.commit()
 
 def import_quant_data():
@@ -197,84 +458,214 @@ def import_quant_data():
         )
         db.session.add(quant_data)
     
+    record_import(QuantData)
     db.session.commit()
 
-def import_jiuyan_news_data():
-    """导入韭研公社新闻数据"""
-    import os
-    import json
+def optional_float(value):
+    """解析可为空的数值列"""
+    return float(value) if value not in (None, '') else None
+
+def parse_wencai_row(row):
+    """解析i问财CSV的一行"""
+    return {
+        'date': parse_date(row['date']),
+        'stock_code': row['stock_code'],
+        'stock_name': row['stock_name'],
+        'indicator_name': row['indicator_name'],
+        'indicator_value': float(row['indicator_value']),
+        'industry': row.get('industry') or None,
+        'market': row.get('market') or None,
+    }
+
+def parse_quant_row(row):
+    """解析量化数据CSV的一行"""
+    return {
+        'date': parse_date(row['date']),
+        'stock_code': row['stock_code'],
+        'stock_name': row['stock_name'],
+        'strategy_name': row['strategy_name'],
+        'signal': row['signal'],
+        'confidence': float(row['confidence']),
+        'target_price': optional_float(row.get('target_price')),
+        'stop_loss': optional_float(row.get('stop_loss')),
+        'period': int(row['period']) if row.get('period') else None,
+    }
+
+def import_dated_csv(model, csv_file, parse_row, label, chunk_size=DEFAULT_CHUNK_SIZE, force=False):
+    """从CSV导入按日期组织的数据：文件中出现的日期整天替换，其他日期的数据保持不变
+
+    与新数据在同一事务中删除这些日期的旧数据，分批写入；源文件没有变化时跳过。
+    """
+    import csv
+    
+    if not os.path.exists(csv_file):
+        print(f"警告: {label}CSV文件 {csv_file} 不存在")
+        return False
+    
+    fingerprint = file_fingerprint(csv_file)
+    if not force and source_unchanged(csv_file, fingerprint):
+        print(f"{label}CSV文件 {csv_file} 自上次导入后没有变化，跳过导入")
+        return True
+    
+    def parsed_rows(reader):
+        for row in reader:
+            try:
+                yield parse_row(row)
+            except (KeyError, ValueError) as e:
+                print(f"警告: {label}数据格式错误: {e}")
+    
+    try:
+        started = time.perf_counter()
+        table = model.__table__
+        replaced_dates = set()
+        record_count = 0
+        with open(csv_file, 'r', encoding='utf-8-sig') as f:
+            for chunk in iter_chunks(parsed_rows(csv.DictReader(f)), chunk_size):
+                new_dates = {row['date'] for row in chunk} - replaced_dates
+                if new_dates:
+                    db.session.execute(delete(table).where(table.c.date.in_(new_dates)))
+                    replaced_dates |= new_dates
+                db.session.execute(insert(table), chunk)
+                record_count += len(chunk)
+        
+        finish_import(None, model, record_count, csv_file, fingerprint, max(replaced_dates, default=None))
+        report_import(label, record_count, started, record_count)
+        return True
+    
+    except Exception as e:
+        print(f"导入{label}时出错: {e}")
+        db.session.rollback()
+        return False
+
+def import_wencai_csv(csv_file="i问财数据.csv", chunk_size=DEFAULT_CHUNK_SIZE, force=False):
+    """导入i问财数据（从CSV文件）"""
+    return import_dated_csv(WenCai, csv_file, parse_wencai_row, "i问财数据", chunk_size, force)
+
+def import_quant_csv(csv_file="量化数据.csv", chunk_size=DEFAULT_CHUNK_SIZE, force=False):
+    """导入量化分析数据（从CSV文件）"""
+    return import_dated_csv(QuantData, csv_file, parse_quant_row, "量化数据", chunk_size, force)
+
+def build_news_stocks(news_id, stock_codes, stock_names):
+    """生成新闻的关联股票行（同一新闻中重复的股票只保留一条）"""
+    news_stocks = []
+    seen = set()
+    for code, name in zip(stock_codes, stock_names):
+        name = (name or '').strip()
+        code = (code or '').strip() or None
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        news_stocks.append({'news_id': news_id, 'stock_code': code, 'stock_name': name})
+    return news_stocks
+
+def news_content_hash(news_date, news_time, news_content):
+    """新闻的去重键: 发布日期、时间和内容的SHA1（日期为 YYYY-MM-DD 文本）"""
+    return hashlib.sha1(f"{news_date} {news_time}\n{news_content}".encode('utf-8')).hexdigest()
+
+def parse_news_item(news_item):
+    """解析一条新闻，返回 (记录行, 股票代码列表, 股票名称列表)，无法解析时返回None"""
+    # 解析发布时间
+    publish_time = news_item.get('publish_time', '')
+    if not publish_time:
+        return None
+        
+    # 提取日期和时间，格式: "2025-10-31 09:44:12"
+    news_time = publish_time[11:]
+    if len(publish_time) != 19 or publish_time[10] != ' ' or not NEWS_TIME_PATTERN.match(news_time):
+        print(f"警告: 时间格式错误: {publish_time}")
+        return None
+    try:
+        news_date = parse_date(publish_time[:10])
+    except ValueError:
+        print(f"警告: 时间格式错误: {publish_time}")
+        return None
     
-    # 新闻数据文件路径
-    news_file = "jiuyangongshe_news.json"
+    # 提取股票信息
+    stock_links = news_item.get('stock_links', [])
+    stock_names = [stock['name'] for stock in stock_links if 'name' in stock]
+    stock_codes = [stock.get('code', '') for stock in stock_links if 'name' in stock]
+    
+    # 如果没有关联股票，使用股票信息中的名称
+    if not stock_names:
+        stock_info = news_item.get('stock_info', [])
+        stock_names = [info['value'] for info in stock_info if info.get('type') == 'linked_stock']
+        stock_codes = [info.get('code', '') for info in stock_info if info.get('type') == 'linked_stock']
+    
+    # 获取新闻内容
+    news_content = news_item.get('content_preview', '')
+    
+    # 生成新闻简介（前30个字）
+    news_summary = news_content[:30] + "..." if len(news_content) > 30 else news_content
+    
+    record = {
+        'news_date': news_date,
+        'news_time': news_time,
+        'stock_codes': ", ".join(stock_codes),
+        'stock_names': ", ".join(stock_names),
+        'news_content': news_content,
+        'news_summary': news_summary,
+        'content_hash': news_content_hash(publish_time[:10], news_time, news_content),
+    }
+    return record, stock_codes, stock_names
+
+def import_jiuyan_news_data(news_file=None, chunk_size=DEFAULT_CHUNK_SIZE, force=False,
+                            full_reload=False):
+    """增量导入韭研公社新闻数据
+
+    新闻文件可以是 JSON Lines 或顶层数组格式，逐条流式读取；未指定时优先使用
+    爬虫追加写入的 jiuyangongshe_news.jsonl。按发布时间和内容的哈希 upsert，只写入新增或关联股票有变化的新闻。
+    源文件自上次导入后没有变化时直接跳过，force=True 时忽略导入水位。
+    full_reload=True 时丢弃现有数据，从文件全量重新导入（写入影子表后原子替换）。
+    """
+    if news_file is None:
+        news_file = first_existing(JIUYAN_NEWS_FILES)
     
     # 检查文件是否存在
     if not os.path.exists(news_file):
         print(f"警告: 韭研公社新闻文件 {news_file} 不存在")
         return False
     
+    fingerprint = file_fingerprint(news_file)
+    if not (force or full_reload) and source_unchanged(news_file, fingerprint):
+        print(f"韭研公社新闻文件 {news_file} 自上次导入后没有变化，跳过导入")
+        return True
+    
+    shadow = None
     try:
-        # 先清空现有新闻数据
-        JiuYanNews.query.delete()
-        db.session.commit()
-        print("已清空现有韭研公社新闻数据")
-        
-        # 读取新闻文件
-        with open(news_file, 'r', encoding='utf-8') as file:
-            news_data = json.load(file)
+        started = time.perf_counter()
+        shadow, tables = import_targets([JiuYanNews, NewsStock], full_reload)
+        news_table, stock_table = tables[JiuYanNews], tables[NewsStock]
         
-        # 解析新闻数据
+        # 逐条读取新闻文件
+        parsed = (parse_news_item(news_item) for news_item in iter_json_records(news_file))
         record_count = 0
-        
-        for news_item in news_data:
-            # 解析发布时间
-            publish_time = news_item.get('publish_time', '')
-            if not publish_time:
-                continue
-                
-            # 提取日期和时间
-            try:
-                # 格式: "2025-10-31 09:44:12"
-                publish_datetime = datetime.strptime(publish_time, '%Y-%m-%d %H:%M:%S')
-                news_date = publish_datetime.date()
-                news_time = publish_datetime.strftime('%H:%M:%S')
-            except ValueError:
-                print(f"警告: 时间格式错误: {publish_time}")
+        changed_count = 0
+        max_date = None
+        for chunk in iter_chunks((item for item in parsed if item is not None), chunk_size):
+            changed = upsert_rows(news_table, [record for record, _, _ in chunk], NEWS_KEY, NEWS_FIELDS)
+            record_count += len(chunk)
+            changed_count += len(changed)
+            max_date = max([record['news_date'] for record, _, _ in chunk] + ([max_date] if max_date else []))
+            if not changed:
                 continue
             
-            # 提取股票信息
-            stock_links = news_item.get('stock_links', [])
-            stock_names = [stock['name'] for stock in stock_links if 'name' in stock]
-            stock_codes = [stock.get('code', '') for stock in stock_links if 'name' in stock]
-            
-            # 如果没有关联股票，使用股票信息中的名称
-            if not stock_names:
-                stock_info = news_item.get('stock_info', [])
-                stock_names = [info['value'] for info in stock_info if info.get('type') == 'linked_stock']
-                stock_codes = [info.get('code', '') for info in stock_info if info.get('type') == 'linked_stock']
-            
-            # 获取新闻内容
-            news_content = news_item.get('content_preview', '')
-            
-            # 生成新闻简介（前30个字）
-            news_summary = news_content[:30] + "..." if len(news_content) > 30 else news_content
-            
-            # 创建新闻记录
-            jiu_yan_news = JiuYanNews(
-                news_date=news_date,
-                news_time=news_time,
-                stock_codes=", ".join(stock_codes),
-                stock_names=", ".join(stock_names),
-                news_content=news_content,
-                news_summary=news_summary
-            )
-            db.session.add(jiu_yan_news)
-            record_count += 1
+            # 新增或有变化的新闻重建关联股票
+            stocks = {(record['content_hash'],): (stock_codes, stock_names)
+                      for record, stock_codes, stock_names in chunk}
+            db.session.execute(delete(stock_table).where(stock_table.c.news_id.in_(list(changed.values()))))
+            stock_rows = []
+            for key, news_id in changed.items():
+                stock_rows.extend(build_news_stocks(news_id, *stocks[key]))
+            if stock_rows:
+                db.session.execute(insert(stock_table), stock_rows)
         
-        db.session.commit()
-        print(f"成功导入韭研公社新闻数据，共 {record_count} 条记录")
+        finish_import(shadow, JiuYanNews, changed_count, news_file, fingerprint, max_date)
+        report_import("韭研公社新闻数据", record_count, started, changed_count)
         return True
         
     except Exception as e:
         print(f"导入韭研公社新闻数据时出错: {e}")
         db.session.rollback()
-        return False
\ No newline at end of file
+        if shadow is not None:
+            shadow.drop()
+        return False
@@ -29,7 +29,21 @@ def generate_lhb_markdown(json_file_path, output_file_path):
         # 读取JSON数据
         with open(json_file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-        
+    except Exception as e:
+        print(f"生成Markdown文件失败: {e}")
+        return False
+    
+    return write_lhb_markdown(data, output_file_path)
+
+def write_lhb_markdown(data, output_file_path):
+    """
+    根据龙虎榜数据生成Markdown表格
+    
+    Args:
+        data: 与 tdx_yzlhb_top30.json 结构相同的字典（top_30_stocks、crawl_time、date）
+        output_file_path: 输出Markdown文件路径
+    """
+    try:
         # 提取股票数据
         stocks = data.get('top_30_stocks', [])
         # 确保stocks不是None，如果是None则设为空列表
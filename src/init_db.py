@@ -1,5 +1,7 @@
 from app import app, db
+from migrations import upgrade_schema
 
 with app.app_context():
     db.create_all()
+    upgrade_schema()
     print("数据库初始化完成")
\ No newline at end of file
@@ -9,10 +9,16 @@
 import requests
 from bs4 import BeautifulSoup
 import json
+import os
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
+from json_stream import append_jsonl, compact_jsonl
+
+# JSON Lines 文件保留最近多少天的新闻，更早的新闻移到归档文件（已在每日任务中导入数据库）
+NEWS_RETENTION_DAYS = 30
+
 class JiuYanGongSheCrawler:
     """韭研公社新闻爬虫类"""
     
@@ -535,6 +541,34 @@ class JiuYanGongSheCrawler:
         except Exception as e:
             print(f"保存文件失败: {e}")
     
+    def append_to_jsonl(self, news_items: List[Dict], filename: str = 'jiuyangongshe_news.jsonl'):
+        """追加新闻数据到JSON Lines文件（每行一条新闻），然后整理文件
+
+        追加后去掉重复的新闻，超过 NEWS_RETENTION_DAYS 天的新闻移到归档文件，
+        导入和生成Markdown时读取的记录数不会随运行次数一直增长。
+        """
+        try:
+            count = append_jsonl(filename, news_items)
+            print(f"新闻数据已追加到: {filename}（{count} 条）")
+        except Exception as e:
+            print(f"追加文件失败: {e}")
+            return
+        
+        cutoff = (datetime.now() - timedelta(days=NEWS_RETENTION_DAYS)).strftime('%Y-%m-%d')
+        archive_file = f"{os.path.splitext(filename)[0]}.archive.jsonl"
+        try:
+            kept, archived, duplicates = compact_jsonl(
+                filename,
+                key=lambda news: (news.get('publish_time', ''), news.get('content_preview', '')),
+                # 发布时间格式异常的新闻无法判断是否过期，保留在文件中
+                keep=lambda news: not re.match(r'\d{4}-\d{2}-\d{2}', news.get('publish_time', ''))
+                                  or news['publish_time'][:10] >= cutoff,
+                archive_path=archive_file,
+            )
+            print(f"整理 {filename}: 保留 {kept} 条，去掉重复 {duplicates} 条，归档 {archived} 条")
+        except Exception as e:
+            print(f"整理文件失败: {e}")
+    
     def print_news(self, news_items: List[Dict]):
         """打印新闻列表"""
         print(f"\n=== 韭研公社股票相关新闻列表（共{len(news_items)}条） ===")
@@ -547,7 +581,7 @@ class JiuYanGongSheCrawler:
             # 显示股票信息
             stock_info = news.get('stock_info', [])
             if stock_info:
-                print(f"   股票信息: ")
+                print("   股票信息: ")
                 for stock in stock_info:
                     print(f"     - {stock['description']}")
             
@@ -582,6 +616,7 @@ def main():
         
         # 保存到文件
         crawler.save_to_json(news_items)
+        crawler.append_to_jsonl(news_items)
         
         # 统计股票信息
         total_stocks = sum(len(news.get('stock_info', [])) for news in news_items)
@@ -0,0 +1,225 @@
+"""
+后台任务
+
+爬虫和导入耗时较长，不能在请求中同步执行。路由只负责提交任务并立即返回任务ID，
+任务在后台线程中按阶段的依赖关系执行，/jobs/<id> 可查询进度和每个阶段的耗时。
+互不依赖的阶段（例如龙虎榜爬虫和新闻爬虫）在线程池中并行执行，
+阶段结束后立即启动依赖它的阶段，不需要固定等待。
+必需阶段失败时任务为 failed；必需阶段都成功、但有可选阶段失败时任务为 partial。
+同名任务正在排队或运行时，新的提交会合并到该任务上，不会重复执行。
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+
+# 保留的历史任务数量
+MAX_FINISHED_JOBS = 50
+
+# 同一任务中同时执行的阶段数
+MAX_STAGE_WORKERS = 4
+
+
+class JobStage:
+    """任务中的一个阶段"""
+
+    def __init__(self, name, func, required=False, after=None):
+        self.name = name
+        self.func = func
+        self.required = required  # 必需阶段失败时不再启动新的阶段
+        self.after = after  # 依赖的阶段名列表，None 表示依赖前一个阶段（按顺序执行）
+        self.status = 'pending'
+        self.started_at = None
+        self.elapsed = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'status': self.status,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'elapsed': round(self.elapsed, 3) if self.elapsed is not None else None,
+            'error': self.error,
+        }
+
+
+class Job:
+    """一次后台任务"""
+
+    def __init__(self, name, stages):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.stages = stages
+        self.status = 'queued'
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'partial', 'failed')
+
+    def to_dict(self):
+        def fmt(value):
+            return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'created_at': fmt(self.created_at),
+            'started_at': fmt(self.started_at),
+            'finished_at': fmt(self.finished_at),
+            'error': self.error,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+
+class JobRunner:
+    """后台任务执行器，每个阶段都在应用上下文中运行"""
+
+    def __init__(self, app):
+        self.app = app
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, stages):
+        """提交任务
+
+        Args:
+            name: 任务名，同名任务同一时间只运行一个
+            stages: [(阶段名, 函数, 是否必需[, 依赖的阶段名列表]), ...]
+
+        Returns:
+            (Job, 是否新建)
+        """
+        stages = [JobStage(*stage) for stage in stages]
+        stage_dependencies(stages)
+
+        with self._lock:
+            active = self._active.get(name)
+            if active is not None and not active.finished:
+                return active, False
+
+            job = Job(name, stages)
+            self._jobs[job.id] = job
+            self._active[name] = job
+            self._prune()
+
+        thread = threading.Thread(target=self._run, args=(job,), name=f"job-{name}", daemon=True)
+        thread.start()
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        """只保留最近的已完成任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started_at = datetime.now()
+        print(f"后台任务开始: {job.name} ({job.id})")
+
+        failed = run_stages(job.stages, self.app.app_context)
+        failed_stages = [stage for stage in job.stages if stage.status == 'failed']
+        if failed is not None:
+            job.status = 'failed'
+            job.error = f"{failed.name} 失败: {failed.error}"
+        elif failed_stages:
+            job.status = 'partial'
+            job.error = "; ".join(f"{stage.name} 失败: {stage.error}" for stage in failed_stages)
+        else:
+            job.status = 'succeeded'
+        job.finished_at = datetime.now()
+        print(f"后台任务结束: {job.name} ({job.id}) {job.status}")
+
+
+def stage_dependencies(stages):
+    """返回 阶段名 -> 依赖的阶段名集合"""
+    names = {stage.name for stage in stages}
+    dependencies = {}
+    previous = None
+    for stage in stages:
+        if stage.after is None:
+            after = {previous} if previous else set()
+        else:
+            after = set(stage.after)
+        unknown = after - names
+        if unknown:
+            raise ValueError(f"阶段 {stage.name} 依赖不存在的阶段: {', '.join(sorted(unknown))}")
+        dependencies[stage.name] = after
+        previous = stage.name
+    return dependencies
+
+
+def run_stage(stage, context=None):
+    """执行一个阶段，记录状态和耗时"""
+    stage.status = 'running'
+    stage.started_at = datetime.now()
+    start = time.monotonic()
+    try:
+        with (context() if context else nullcontext()):
+            result = stage.func()
+        # 导入函数以返回False表示失败
+        stage.status = 'failed' if result is False else 'done'
+        if result is False:
+            stage.error = '阶段返回失败'
+    except Exception as e:
+        stage.status = 'failed'
+        stage.error = str(e)
+        traceback.print_exc()
+    stage.elapsed = time.monotonic() - start
+    print(f"  阶段 {stage.name}: {stage.status}，耗时 {stage.elapsed:.2f} 秒")
+
+
+def run_stages(stages, context=None, max_workers=MAX_STAGE_WORKERS):
+    """按依赖关系执行阶段
+
+    依赖的阶段都结束后（无论成功与否）立即启动，互不依赖的阶段并行执行。
+    必需阶段失败后不再启动新的阶段，正在执行的阶段继续完成，未启动的阶段标记为 skipped。
+
+    Args:
+        stages: JobStage 列表
+        context: 返回上下文管理器的函数（例如 app.app_context），每个阶段在其中执行
+        max_workers: 同时执行的阶段数
+
+    Returns:
+        第一个失败的必需阶段，没有时返回 None
+    """
+    dependencies = stage_dependencies(stages)
+    pending = list(stages)
+    finished = set()
+    running = {}
+    failed = None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stage') as executor:
+        while pending or running:
+            if failed is None:
+                for stage in [stage for stage in pending if dependencies[stage.name] <= finished]:
+                    pending.remove(stage)
+                    running[executor.submit(run_stage, stage, context)] = stage
+            if not running:
+                # 剩余阶段的依赖无法满足（循环依赖）
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                finished.add(stage.name)
+                if stage.status == 'failed' and stage.required and failed is None:
+                    failed = stage
+
+    for stage in pending:
+        stage.status = 'skipped'
+    return failed
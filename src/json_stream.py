@@ -0,0 +1,170 @@
+"""
+JSON 记录文件的流式读写
+
+新闻等数据文件会随着爬取天数增长，json.load 需要把整个文件读入内存。
+这里按记录逐条读取，内存占用与文件大小无关，支持两种格式:
+- JSON Lines: 每行一个 JSON 对象（爬虫追加写入的格式）
+- 顶层为数组的 JSON 文件: [{...}, {...}]（原有格式）
+
+JSON Lines 文件只追加写入，compact_jsonl 定期去掉重复记录并把过期记录移到归档文件，
+使文件大小和每次读取的记录数保持在保留期限内的数量。
+"""
+
+import json
+import os
+
+# 韭研公社新闻文件：优先使用爬虫追加写入的 JSON Lines 文件
+JIUYAN_NEWS_FILES = ("jiuyangongshe_news.jsonl", "jiuyangongshe_news.json")
+
+# 每次从文件读取的字符数
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\r\n'
+
+
+def first_existing(paths):
+    """返回第一个存在的文件路径，都不存在时返回最后一个"""
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return paths[-1]
+
+
+def iter_json_records(path, read_size=READ_SIZE):
+    """逐条读取 JSON Lines 或顶层数组格式的文件，按文件中的顺序返回记录"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        head = f.read(read_size)
+        stripped = head.lstrip(_WHITESPACE)
+        if stripped.startswith('['):
+            yield from _iter_array(f, stripped[1:], read_size)
+            return
+
+        # JSON Lines：逐行解析，空行跳过
+        buffer = head
+        line_number = 0
+        while True:
+            lines = buffer.split('\n')
+            buffer = lines.pop()
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield _loads_line(line, path, line_number)
+            more = f.read(read_size)
+            if not more:
+                break
+            buffer += more
+        if buffer.strip():
+            yield _loads_line(buffer, path, line_number + 1)
+
+
+def _loads_line(line, path, line_number):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path} 第 {line_number} 行不是有效的JSON: {e}") from e
+
+
+def _iter_array(f, buffer, read_size):
+    """逐个解析顶层数组中的元素，buffer 为 '[' 之后已读入的内容"""
+    decoder = json.JSONDecoder()
+    pos = 0
+    eof = False
+    expect_value = True
+
+    while True:
+        # 跳过空白，缓冲区用完时继续读取
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("JSON数组不完整: 缺少 ']'")
+            buffer, pos = buffer[pos:] + f.read(read_size), 0
+            eof = pos >= len(buffer)
+            continue
+
+        char = buffer[pos]
+        if char == ']':
+            return
+        if not expect_value:
+            if char != ',':
+                raise ValueError(f"JSON数组格式错误: 期望 ',' 或 ']'，实际为 {char!r}")
+            pos += 1
+            expect_value = True
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            value, end = None, None
+        # 解析失败或恰好解析到缓冲区末尾（数字等可能被截断）时，读入更多内容再试
+        if (end is None or end >= len(buffer)) and not eof:
+            more = f.read(read_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        if end is None:
+            raise ValueError("JSON数组格式错误: 元素不完整")
+
+        yield value
+        pos = end
+        expect_value = False
+        # 丢弃已解析的部分，缓冲区大小保持在读取块大小附近
+        if pos > read_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def append_jsonl(path, records):
+    """把记录追加到 JSON Lines 文件，返回写入的条数"""
+    count = 0
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def compact_jsonl(path, key, keep, archive_path):
+    """整理 JSON Lines 文件: 去掉重复记录，keep(记录) 为False的记录追加到归档文件
+
+    逐条读写，内存中只保存保留下来的记录的键。先写临时文件再替换，中断时原文件不受影响。
+
+    Args:
+        path: JSON Lines 文件
+        key: 记录 -> 去重键，键相同的记录只保留第一条
+        keep: 记录 -> 是否留在文件中
+        archive_path: 归档文件
+
+    Returns:
+        (保留条数, 归档条数, 去掉的重复条数)
+    """
+    if not os.path.exists(path):
+        return 0, 0, 0
+    kept = archived = duplicates = 0
+    seen = set()
+    temp_path = f"{path}.tmp"
+    archive = None
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as out:
+            for record in iter_json_records(path):
+                if not keep(record):
+                    if archive is None:
+                        archive = open(archive_path, 'a', encoding='utf-8')
+                    archive.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    archived += 1
+                    continue
+                record_key = key(record)
+                if record_key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(record_key)
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                kept += 1
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if archive is not None:
+            archive.close()
+    os.replace(temp_path, path)
+    return kept, archived, duplicates
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+龙虎榜数据管道
+
+原来的流程是 爬虫 -> tdx_yzlhb_top30.json -> 龙虎榜数据.csv -> 数据库，每一步都要写文件再重新解析。
+这里让爬虫直接产生 LHBRecord 记录，导入程序直接消费，不经过中间文件；
+JSON、CSV、Markdown 文件改为可选的输出（sink），格式与原来的文件相同。
+
+用法:
+    python lhb_pipeline.py --days 3 --csv --markdown
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+# JSON 和 Markdown 快照只包含最新一天净买入前N的股票，数据库和CSV保存当天全部上榜股票
+TOP_N = 30
+
+# CSV 输出的列（与导入程序读取的龙虎榜CSV相同，旧文件没有 category 列）
+CSV_FIELDNAMES = ['rank', 'stock_code', 'stock_name', 'buyers', 'change_percent', 'net_buy_amount', 'date', 'category']
+
+
+@dataclass
+class LHBRecord:
+    """一条龙虎榜记录，数值保持原始类型: 涨跌幅为百分数，净买入为元"""
+    date: date
+    rank: int
+    stock_code: str
+    stock_name: str
+    buyers: str
+    change_percent: float
+    net_buy_amount: float
+    category: str = 'jm'  # 类别: jm-游资, pt-普通, jg-机构
+    market: str = ''  # 市场代码
+    list_type: str = ''  # 上榜类型
+    # 游资买卖明细: [{'trader', 'buy_amount', 'sell_amount', 'net_buy_amount'}, ...]，金额为元
+    trades: list = field(default_factory=list)
+
+    @classmethod
+    def from_tdx(cls, row, data_date, rank):
+        """从爬虫解析后的数据（gpdm、gpmc、jmr 等字段）创建记录"""
+        return cls(
+            date=data_date,
+            rank=rank,
+            stock_code=str(row.get('gpdm', '')).strip(),
+            stock_name=str(row.get('gpmc', '')).strip(),
+            buyers=row.get('yzmc') or '未知',
+            change_percent=float(row.get('zdf') or 0),
+            net_buy_amount=float(row.get('jmr') or 0),
+            category=row.get('lx') or 'jm',
+            market=row.get('sc', ''),
+            list_type=row.get('sblx', ''),
+            trades=[
+                {
+                    'trader': str(item.get('yzmc', '')).strip(),
+                    'buy_amount': float(item.get('mrje') or 0),
+                    'sell_amount': float(item.get('mcje') or 0),
+                    'net_buy_amount': float(item.get('jmr') or 0),
+                }
+                for item in row.get('yz_details', [])
+                if str(item.get('yzmc', '')).strip()
+            ],
+        )
+
+    def to_tdx(self):
+        """转换为爬虫的数据格式，用于 JSON 和 Markdown 输出"""
+        return {
+            'sc': self.market,
+            'gpmc': self.stock_name,
+            'gpdm': self.stock_code,
+            'sblx': self.list_type,
+            'jmr': self.net_buy_amount,
+            'yzmc': self.buyers,
+            'zdf': self.change_percent,
+            'lx': self.category,
+        }
+
+    def to_db_row(self):
+        """转换为 dragon_tiger 表的行"""
+        return {
+            'rank': self.rank,
+            'date': self.date,
+            'stock_code': self.stock_code,
+            'stock_name': self.stock_name,
+            'buyers': self.buyers,
+            'change_percent': self.change_percent,
+            'net_buy_amount': self.net_buy_amount,
+            'category': self.category,
+        }
+
+    def trade_rows(self):
+        """转换为 trader_trade 表的行（trader 为游资名称，导入时换成 trader_id）"""
+        return [
+            dict(trade, date=self.date, stock_code=self.stock_code, stock_name=self.stock_name)
+            for trade in self.trades
+        ]
+
+    def to_csv_row(self):
+        """转换为龙虎榜CSV的行"""
+        row = self.to_db_row()
+        row['date'] = self.date.isoformat()
+        return row
+
+
+def records_from_tdx(date_str, rows, top_n=None):
+    """把爬虫返回的一天数据按类别分别按净买入排序，转换为记录（top_n 为每个类别保留的条数，None 时保留全部）"""
+    data_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    by_category = {}
+    for row in sorted(rows, key=lambda row: row.get('jmr', 0), reverse=True):
+        by_category.setdefault(row.get('lx') or 'jm', []).append(row)
+
+    records = []
+    for category_rows in by_category.values():
+        # 同一只股票因多个上榜原因出现多次时，只保留净买入最大的一条（数据库按日期、股票代码和类别唯一）
+        ranked = []
+        seen = set()
+        for row in category_rows:
+            code = str(row.get('gpdm', '')).strip()
+            if code not in seen:
+                seen.add(code)
+                ranked.append(row)
+        records.extend(LHBRecord.from_tdx(row, data_date, rank) for rank, row in enumerate(ranked[:top_n], 1))
+    return records
+
+
+def crawl_lhb_records(days=1, force_today=False, top_n=None, all_categories=False):
+    """运行爬虫获取最近 days 个有数据的交易日，按日期从新到旧返回记录
+
+    all_categories=True 时每天并发获取游资、普通、机构三个类别，否则只获取第一个有数据的类别。
+    """
+    # 爬虫模块导入时会配置日志，只在真正爬取时导入
+    from tdx_yzlhb_crawler import TDXYZLHBSpider, fetch_recent_lhb
+
+    spider = TDXYZLHBSpider()
+    all_stock_data = fetch_recent_lhb(spider, days, force_today, all_categories=all_categories)
+    records = []
+    for date_str in sorted(all_stock_data, reverse=True):
+        records.extend(records_from_tdx(date_str, all_stock_data[date_str], top_n))
+    return records
+
+
+def _latest_day(records):
+    """最新一天的 (日期, 记录列表)，按净买入从大到小排列，多个类别中的同一只股票只保留一条"""
+    if not records:
+        return None, []
+    latest = max(record.date for record in records)
+    latest_records = []
+    seen = set()
+    for record in sorted((record for record in records if record.date == latest),
+                         key=lambda r: r.net_buy_amount, reverse=True):
+        if record.stock_code not in seen:
+            seen.add(record.stock_code)
+            latest_records.append(record)
+    return latest, latest_records
+
+
+def _top30_data(records):
+    """最新一天的数据，结构与 tdx_yzlhb_top30.json 相同"""
+    latest, latest_records = _latest_day(records)
+    return {
+        'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'date': latest.isoformat() if latest else datetime.now().strftime('%Y-%m-%d'),
+        'top_30_stocks': [record.to_tdx() for record in latest_records[:TOP_N]],
+        'days_fetched': len({record.date for record in records}),
+    }
+
+
+class JsonSink:
+    """输出最新一天净买入前30的数据到 tdx_yzlhb_top30.json"""
+
+    def __init__(self, path="tdx_yzlhb_top30.json"):
+        self.path = path
+
+    def write(self, records):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(_top30_data(records), f, ensure_ascii=False, indent=2)
+        print(f"龙虎榜数据已保存到 {self.path}")
+
+
+class CsvSink:
+    """输出全部记录到龙虎榜CSV文件"""
+
+    def __init__(self, path="龙虎榜数据.csv"):
+        self.path = path
+
+    def write(self, records):
+        with open(self.path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record.to_csv_row())
+        print(f"成功生成龙虎榜CSV文件: {self.path}")
+
+
+class MarkdownSink:
+    """输出最新一天净买入前30的数据到龙虎榜Markdown文件"""
+
+    def __init__(self, path="龙虎榜数据.md"):
+        self.path = path
+
+    def write(self, records):
+        from generate_lhb_markdown import write_lhb_markdown
+
+        write_lhb_markdown(_top30_data(records), self.path)
+
+
+def run_lhb_pipeline(records, sinks=(), import_db=True, full_reload=False):
+    """把记录写入各个输出，并直接导入数据库（导入需在应用上下文中调用）
+
+    Args:
+        records: LHBRecord 列表或迭代器，例如 crawl_lhb_records() 的结果
+        sinks: JsonSink、CsvSink、MarkdownSink 等输出
+        import_db: 是否导入数据库
+        full_reload: 全量重新导入（见 data_import.import_dragontiger_records）
+
+    Returns:
+        是否成功
+    """
+    records = list(records)
+    if not records:
+        print("没有获取到龙虎榜数据")
+        return False
+
+    for sink in sinks:
+        sink.write(records)
+
+    if import_db:
+        from data_import import import_dragontiger_records
+
+        return import_dragontiger_records(records, full_reload=full_reload)
+    return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='龙虎榜数据管道: 爬取并直接导入数据库')
+    parser.add_argument('--days', type=int, default=1, help='要获取的天数，默认为1天')
+    parser.add_argument('--force-today', action='store_true', help='强制尝试获取当天数据')
+    parser.add_argument('--all-categories', action='store_true', help='同时获取游资、普通、机构三个类别')
+    parser.add_argument('--json', nargs='?', const='tdx_yzlhb_top30.json', help='同时输出JSON文件')
+    parser.add_argument('--csv', nargs='?', const='龙虎榜数据.csv', help='同时输出CSV文件')
+    parser.add_argument('--markdown', nargs='?', const='龙虎榜数据.md', help='同时输出Markdown文件')
+    parser.add_argument('--no-db', action='store_true', help='不导入数据库')
+    args = parser.parse_args()
+
+    sinks = []
+    if args.json:
+        sinks.append(JsonSink(args.json))
+    if args.csv:
+        sinks.append(CsvSink(args.csv))
+    if args.markdown:
+        sinks.append(MarkdownSink(args.markdown))
+
+    records = crawl_lhb_records(max(1, min(30, args.days)), args.force_today, all_categories=args.all_categories)
+    if args.no_db:
+        run_lhb_pipeline(records, sinks, import_db=False)
+        return
+
+    from app import app
+
+    with app.app_context():
+        run_lhb_pipeline(records, sinks)
+
+
+if __name__ == "__main__":
+    main()
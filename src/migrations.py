@@ -0,0 +1,258 @@
+"""
+数据库结构升级
+
+db.create_all() 只会创建缺失的表，不会修改已有的表。
+这里补齐已有数据库缺少的结构（例如后来在模型中声明的索引），可以重复执行。
+SQLite 不能修改列类型，需要改类型时按 "建新表 -> 复制数据 -> 删除旧表 -> 新表改名" 重建，
+整个过程在一个事务中完成。不能先把旧表改名: SQLite 3.26 起改名会同时改写其他表中
+指向它的外键（例如 dragon_tiger_trader），删除旧表后这些外键就指向了不存在的表。
+"""
+
+from sqlalchemy import MetaData, inspect, insert, select
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import String
+
+from models import db, DragonTiger, Trader, DragonTigerTrader, JiuYanNews, NewsStock
+from number_format import parse_percent, parse_amount
+
+
+# 影子表全量重新导入后，正式表的索引名可能带有此后缀（见 shadow_tables）
+SHADOW_SUFFIX = '_shadow'
+
+
+def index_base_name(name):
+    """去掉影子表后缀的索引名，带后缀的索引与模型中声明的同名索引等价"""
+    return name[:-len(SHADOW_SUFFIX)] if name.endswith(SHADOW_SUFFIX) else name
+
+
+def begin_transaction(conn):
+    """显式开始SQLite事务
+
+    pysqlite 只会在 DML 语句前自动开启事务，ALTER/DROP/CREATE 会立即生效，
+    重建表时需要手动 BEGIN 才能保证整体原子性。
+    """
+    conn.exec_driver_sql("BEGIN")
+
+
+def convert_dragontiger_numeric():
+    """一次性迁移：把龙虎榜的涨跌幅、净买入金额从文本转换为数值
+
+    旧数据库中这两列保存的是 "10.00%"、"3.93亿" 这样的字符串，
+    迁移后分别为百分数和以元为单位的金额。已经是数值列时直接返回False。
+    所有记录原样复制，重复记录由之后的 remove_duplicate_keys 删除；
+    新表先不建索引，索引由 create_missing_indexes 创建。
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table('dragon_tiger'):
+        return False
+    column_types = {column['name']: column['type'] for column in inspector.get_columns('dragon_tiger')}
+    if not isinstance(column_types.get('change_percent'), String):
+        return False
+
+    print("迁移龙虎榜数据: 涨跌幅和净买入金额转换为数值...")
+    index_names = [index['name'] for index in inspector.get_indexes('dragon_tiger')]
+    with db.engine.begin() as conn:
+        # 注册解析函数，数据复制完全在SQL中完成，不需要把整表读入内存
+        dbapi_connection = conn.connection.dbapi_connection
+        dbapi_connection.create_function('parse_percent', 1, parse_percent)
+        dbapi_connection.create_function('parse_amount', 1, parse_amount)
+
+        begin_transaction(conn)
+        for name in index_names:
+            conn.exec_driver_sql(f'DROP INDEX "{name}"')
+        new_table = DragonTiger.__table__.to_metadata(MetaData(), name='dragon_tiger_new')
+        conn.execute(CreateTable(new_table))
+        result = conn.exec_driver_sql(
+            'INSERT INTO dragon_tiger_new '
+            '(id, rank, date, stock_code, stock_name, buyers, change_percent, net_buy_amount) '
+            'SELECT id, rank, date, stock_code, stock_name, buyers, '
+            'COALESCE(parse_percent(change_percent), 0), COALESCE(parse_amount(net_buy_amount), 0) '
+            'FROM dragon_tiger'
+        )
+        conn.exec_driver_sql('DROP TABLE dragon_tiger')
+        conn.exec_driver_sql('ALTER TABLE dragon_tiger_new RENAME TO dragon_tiger')
+    print(f"龙虎榜数据迁移完成，共 {result.rowcount} 条记录")
+    return True
+
+
+def add_news_content_hash():
+    """一次性迁移：为已有新闻添加 content_hash 列并计算哈希"""
+    # 避免循环导入：data_import 依赖的模块不依赖本模块
+    from data_import import news_content_hash
+
+    inspector = inspect(db.engine)
+    if not inspector.has_table('jiu_yan_news'):
+        return False
+    if 'content_hash' in {column['name'] for column in inspector.get_columns('jiu_yan_news')}:
+        return False
+
+    print("迁移韭研公社新闻: 添加内容哈希列...")
+    with db.engine.begin() as conn:
+        conn.connection.dbapi_connection.create_function('news_content_hash', 3, news_content_hash)
+        begin_transaction(conn)
+        conn.exec_driver_sql('ALTER TABLE jiu_yan_news ADD COLUMN content_hash VARCHAR(40)')
+        result = conn.exec_driver_sql(
+            'UPDATE jiu_yan_news SET content_hash = news_content_hash(news_date, news_time, news_content)'
+        )
+    print(f"新闻内容哈希计算完成，共 {result.rowcount} 条记录")
+    return True
+
+
+def add_dragontiger_category():
+    """一次性迁移：为龙虎榜添加类别列，唯一键改为 (日期, 股票代码, 类别)
+
+    已有记录的类别为默认值 jm（原来的爬虫优先获取游资榜）。新的唯一索引由 create_missing_indexes 创建。
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table('dragon_tiger'):
+        return False
+    has_column = 'category' in {column['name'] for column in inspector.get_columns('dragon_tiger')}
+    has_old_index = 'ux_dragon_tiger_date_stock_code' in {index['name'] for index in inspector.get_indexes('dragon_tiger')}
+    if has_column and not has_old_index:
+        return False
+
+    print("迁移龙虎榜数据: 添加类别列...")
+    with db.engine.begin() as conn:
+        begin_transaction(conn)
+        if not has_column:
+            conn.exec_driver_sql("ALTER TABLE dragon_tiger ADD COLUMN category VARCHAR(10) NOT NULL DEFAULT 'jm'")
+        if has_old_index:
+            conn.exec_driver_sql('DROP INDEX ux_dragon_tiger_date_stock_code')
+    return True
+
+
+def remove_duplicate_keys(table_name, index_name, key_columns, child_tables=()):
+    """创建唯一索引前删除重复记录，每个键保留ID最大（最近导入）的一条
+
+    Args:
+        table_name: 表名
+        index_name: 将要创建的唯一索引名，已存在时直接返回
+        key_columns: 唯一键列名
+        child_tables: 引用该表的 (表名, 外键列名)，重复记录的关联行一起删除
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table(table_name):
+        return 0
+    if index_name in {index_base_name(index['name']) for index in inspector.get_indexes(table_name)}:
+        return 0
+
+    # 唯一索引允许多个NULL，键为NULL的记录不算重复
+    not_null = " AND ".join(f"{column} IS NOT NULL" for column in key_columns)
+    duplicates = (f'SELECT id FROM {table_name} WHERE {not_null} AND id NOT IN '
+                  f'(SELECT MAX(id) FROM {table_name} GROUP BY {", ".join(key_columns)})')
+    linked = 0
+    with db.engine.begin() as conn:
+        for child_table, foreign_key in child_tables:
+            if inspector.has_table(child_table):
+                linked += conn.exec_driver_sql(
+                    f'DELETE FROM {child_table} WHERE {foreign_key} IN ({duplicates})').rowcount
+        removed = conn.exec_driver_sql(f'DELETE FROM {table_name} WHERE id IN ({duplicates})').rowcount
+    print(f"创建唯一索引 {index_name} 前检查重复记录: 删除 {table_name} 中的 {removed} 条重复记录"
+          f"（关联行 {linked} 条）")
+    return removed
+
+
+def create_missing_indexes():
+    """为已有的表创建模型中声明但数据库中缺少的索引，返回新建的索引名"""
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index_base_name(index['name']) for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+                print(f"已创建索引: {index.name}")
+    return created
+
+
+def backfill_news_stock(chunk_size=1000):
+    """一次性迁移：根据已有新闻的 stock_codes/stock_names 填充 news_stock 表"""
+    if db.session.query(NewsStock.id).first() is not None:
+        return False
+    if db.session.query(JiuYanNews.id).first() is None:
+        return False
+
+    print("迁移韭研公社新闻: 填充新闻-股票关联表...")
+    stmt = select(JiuYanNews.id, JiuYanNews.stock_codes, JiuYanNews.stock_names)
+    links = []
+    total = 0
+    with db.engine.begin() as conn:
+        # 读写使用同一个连接（SQLite 中另一个连接的读游标会阻塞提交）
+        for news_id, stock_codes, stock_names in conn.execute(stmt):
+            codes = stock_codes.split(', ') if stock_codes else []
+            names = stock_names.split(', ') if stock_names else []
+            seen = set()
+            for i, name in enumerate(names):
+                name = name.strip()
+                if not name or name in seen:
+                    continue
+                seen.add(name)
+                code = codes[i].strip() if i < len(codes) else ''
+                links.append({'news_id': news_id, 'stock_code': code or None, 'stock_name': name})
+            if len(links) >= chunk_size:
+                conn.execute(insert(NewsStock), links)
+                total += len(links)
+                links = []
+        if links:
+            conn.execute(insert(NewsStock), links)
+            total += len(links)
+    print(f"新闻-股票关联表填充完成，共 {total} 条记录")
+    return True
+
+
+def backfill_dragontiger_traders(chunk_size=1000):
+    """一次性迁移：根据已有龙虎榜记录的 buyers 文本填充买方字典和关联表"""
+    # 避免循环导入：data_import 依赖的模块不依赖本模块
+    from data_import import split_trader_names
+
+    if db.session.query(DragonTigerTrader.dragon_tiger_id).first() is not None:
+        return False
+    if db.session.query(DragonTiger.id).first() is None:
+        return False
+
+    print("迁移龙虎榜数据: 填充买方字典和关联表...")
+    stmt = select(DragonTiger.id, DragonTiger.date, DragonTiger.buyers)
+    total = 0
+    with db.engine.begin() as conn:
+        # 第一遍：补齐买方字典
+        names = set()
+        for _, _, buyers in conn.execute(stmt):
+            names.update(split_trader_names(buyers))
+        trader_ids = dict(conn.execute(select(Trader.name, Trader.id)).all())
+        missing = [{'name': name} for name in sorted(names) if name not in trader_ids]
+        if missing:
+            conn.execute(insert(Trader), missing)
+            trader_ids = dict(conn.execute(select(Trader.name, Trader.id)).all())
+
+        # 第二遍：写入关联
+        links = []
+        for dragon_tiger_id, data_date, buyers in conn.execute(stmt):
+            for position, name in enumerate(split_trader_names(buyers)):
+                links.append({'dragon_tiger_id': dragon_tiger_id, 'trader_id': trader_ids[name],
+                              'position': position, 'date': data_date})
+            if len(links) >= chunk_size:
+                conn.execute(insert(DragonTigerTrader), links)
+                total += len(links)
+                links = []
+        if links:
+            conn.execute(insert(DragonTigerTrader), links)
+            total += len(links)
+    print(f"买方关联表填充完成，共 {len(trader_ids)} 个买方，{total} 条关联")
+    return True
+
+
+def upgrade_schema():
+    """执行全部结构升级步骤（需在应用上下文中调用）"""
+    convert_dragontiger_numeric()
+    add_news_content_hash()
+    add_dragontiger_category()
+    remove_duplicate_keys('dragon_tiger', 'ux_dragon_tiger_date_stock_code_category',
+                          ['date', 'stock_code', 'category'], [('dragon_tiger_trader', 'dragon_tiger_id')])
+    remove_duplicate_keys('jiu_yan_news', 'ux_jiu_yan_news_content_hash', ['content_hash'],
+                          [('news_stock', 'news_id')])
+    create_missing_indexes()
+    backfill_news_stock()
+    backfill_dragontiger_traders()
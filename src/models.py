@@ -1,8 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
+import sqlite3
 
 db = SQLAlchemy()
 
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    """SQLite 使用 WAL 日志模式，导入写入和替换表时页面读取不会被阻塞"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.close()
+
+# 龙虎榜类别: 类别代码 -> 名称
+DRAGONTIGER_CATEGORIES = {'jm': '游资', 'pt': '普通', 'jg': '机构'}
+
 class DragonTiger(db.Model):
     """龙虎榜数据模型"""
     id = db.Column(db.Integer, primary_key=True)
@@ -11,12 +25,78 @@ class DragonTiger(db.Model):
     stock_code = db.Column(db.String(10), nullable=False)
     stock_name = db.Column(db.String(50), nullable=False)
     buyers = db.Column(db.String(200), nullable=True)  # 购买人/机构
-    change_percent = db.Column(db.String(20), nullable=False)  # 涨跌幅（百分比字符串）
-    net_buy_amount = db.Column(db.String(50), nullable=False)  # 净买入金额（带单位）
+    change_percent = db.Column(db.Float, nullable=False)  # 涨跌幅（百分数，如10.0表示10%）
+    net_buy_amount = db.Column(db.Float, nullable=False)  # 净买入金额（元）
+    # 类别（见 DRAGONTIGER_CATEGORIES），增加此列之前的数据都来自游资榜
+    category = db.Column(db.String(10), nullable=False, default='jm', server_default='jm')
+    
+    # 买方关联（buyers 保留原始顺序的文本，供列表页直接展示）
+    trader_links = db.relationship('DragonTigerTrader', backref='dragon_tiger',
+                                   cascade='all, delete-orphan', order_by='DragonTigerTrader.position')
+    
+    __table_args__ = (
+        # 列表页排序 (date DESC, rank, id) 和游标分页
+        db.Index('ix_dragon_tiger_date_rank', date.desc(), rank),
+        # 按股票查询上榜记录
+        db.Index('ix_dragon_tiger_stock_code_date', stock_code, date),
+        # 增量导入的唯一键（每只股票每天每个类别一条）
+        db.Index('ux_dragon_tiger_date_stock_code_category', date, stock_code, category, unique=True),
+    )
     
     def __repr__(self):
         return f'<DragonTiger {self.rank} {self.stock_code} {self.date}>'
 
+class Trader(db.Model):
+    """龙虎榜买方字典（游资、机构、营业部），每个名称只保存一次"""
+    __tablename__ = 'trader'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)  # 名称
+    
+    def __repr__(self):
+        return f'<Trader {self.name}>'
+
+class DragonTigerTrader(db.Model):
+    """龙虎榜记录与买方的多对多关联"""
+    __tablename__ = 'dragon_tiger_trader'
+    dragon_tiger_id = db.Column(db.Integer, db.ForeignKey('dragon_tiger.id'), primary_key=True)
+    trader_id = db.Column(db.Integer, db.ForeignKey('trader.id'), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)  # 在买方列表中的顺序
+    date = db.Column(db.Date, nullable=False)  # 上榜日期（冗余，便于按买方和日期范围查询）
+    
+    trader = db.relationship('Trader')
+    
+    __table_args__ = (
+        # 按买方查询某段时间的上榜记录
+        db.Index('ix_dragon_tiger_trader_trader_date', trader_id, date),
+    )
+    
+    def __repr__(self):
+        return f'<DragonTigerTrader {self.dragon_tiger_id} {self.trader_id}>'
+
+class TraderTrade(db.Model):
+    """游资在某只上榜股票上的买入、卖出金额（来自游资详情接口 cfg_fx_yzlhb_yz）"""
+    __tablename__ = 'trader_trade'
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)  # 上榜日期
+    stock_code = db.Column(db.String(10), nullable=False)
+    stock_name = db.Column(db.String(50), nullable=False)
+    trader_id = db.Column(db.Integer, db.ForeignKey('trader.id'), nullable=False)
+    buy_amount = db.Column(db.Float, nullable=False, default=0)  # 买入金额（元）
+    sell_amount = db.Column(db.Float, nullable=False, default=0)  # 卖出金额（元）
+    net_buy_amount = db.Column(db.Float, nullable=False, default=0)  # 净买入金额（元）
+
+    trader = db.relationship('Trader')
+
+    __table_args__ = (
+        # 按游资查询某段时间的买卖明细
+        db.Index('ix_trader_trade_trader_date', trader_id, date),
+        # 增量导入的唯一键（每个游资每天每只股票一条），也用于按日期和股票查询
+        db.Index('ux_trader_trade_date_stock_code_trader', date, stock_code, trader_id, unique=True),
+    )
+
+    def __repr__(self):
+        return f'<TraderTrade {self.trader_id} {self.stock_code} {self.date}>'
+
 class JiuYan(db.Model):
     """韭研公社数据模型"""
     id = db.Column(db.Integer, primary_key=True)
@@ -32,6 +112,10 @@ class JiuYan(db.Model):
     dividend_yield = db.Column(db.Float, nullable=True)  # 股息率
     roe = db.Column(db.Float, nullable=True)  # 净资产收益率
     
+    __table_args__ = (
+        db.Index('ix_jiu_yan_date', date),
+    )
+    
     def __repr__(self):
         return f'<JiuYan {self.stock_code} {self.date}>'
 
@@ -46,6 +130,10 @@ class WenCai(db.Model):
     industry = db.Column(db.String(50), nullable=True)  # 所属行业
     market = db.Column(db.String(20), nullable=True)  # 市场板块
     
+    __table_args__ = (
+        db.Index('ix_wen_cai_date', date),
+    )
+    
     def __repr__(self):
         return f'<WenCai {self.stock_code} {self.date}>'
 
@@ -62,6 +150,12 @@ class QuantData(db.Model):
     stop_loss = db.Column(db.Float, nullable=True)  # 止损价格
     period = db.Column(db.Integer, nullable=True)  # 持有期（天）
     
+    __table_args__ = (
+        db.Index('ix_quant_data_date', date),
+        # 按策略查询信号
+        db.Index('ix_quant_data_strategy_name_date', strategy_name, date),
+    )
+    
     def __repr__(self):
         return f'<QuantData {self.stock_code} {self.date}>'
 
@@ -75,6 +169,56 @@ class JiuYanNews(db.Model):
     news_content = db.Column(db.Text, nullable=False)  # 新闻内容
     news_summary = db.Column(db.String(100), nullable=False)  # 新闻简介（前30个字）
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # 创建时间
+    content_hash = db.Column(db.String(40), nullable=True)  # 发布时间和内容的哈希（增量导入的唯一键）
+    
+    # 关联股票（用于按股票查询新闻，stock_codes/stock_names 保留用于页面展示）
+    stocks = db.relationship('NewsStock', backref='news', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # 列表页排序 (news_date DESC, news_time DESC, id DESC)
+        db.Index('ix_jiu_yan_news_date_time', news_date, news_time),
+        db.Index('ux_jiu_yan_news_content_hash', content_hash, unique=True),
+    )
+    
+    def __repr__(self):
+        return f'<JiuYanNews {self.news_date} {self.news_time}>'
+
+class NewsStock(db.Model):
+    """新闻与关联股票的对应关系"""
+    __tablename__ = 'news_stock'
+    id = db.Column(db.Integer, primary_key=True)
+    news_id = db.Column(db.Integer, db.ForeignKey('jiu_yan_news.id'), nullable=False)  # 新闻ID
+    stock_code = db.Column(db.String(10), nullable=True)  # 股票代码（部分新闻没有代码）
+    stock_name = db.Column(db.String(50), nullable=False)  # 股票名称
+    
+    __table_args__ = (
+        # 按股票名称或代码查询新闻
+        db.Index('ix_news_stock_stock_name', stock_name, news_id),
+        db.Index('ix_news_stock_stock_code', stock_code, news_id),
+        db.Index('ix_news_stock_news_id', news_id),
+    )
+    
+    def __repr__(self):
+        return f'<NewsStock {self.news_id} {self.stock_name}>'
+
+class TableStats(db.Model):
+    """数据表统计信息（由导入程序在导入事务中维护）"""
+    __tablename__ = 'table_stats'
+    table_name = db.Column(db.String(50), primary_key=True)  # 表名
+    row_count = db.Column(db.Integer, nullable=False, default=0)  # 行数
+    generation = db.Column(db.Integer, nullable=False, default=0)  # 导入次数（数据版本号）
+    last_import_at = db.Column(db.DateTime, nullable=True)  # 最近导入时间（UTC）
+    
+    def __repr__(self):
+        return f'<TableStats {self.table_name} {self.row_count}>'
+
+class ImportWatermark(db.Model):
+    """数据源的导入水位，源文件没有变化时跳过导入"""
+    __tablename__ = 'import_watermark'
+    source = db.Column(db.String(100), primary_key=True)  # 数据源（文件名）
+    fingerprint = db.Column(db.String(64), nullable=False)  # 文件指纹（大小和修改时间）
+    max_date = db.Column(db.Date, nullable=True)  # 已导入数据的最新日期
+    imported_at = db.Column(db.DateTime, nullable=False)  # 最近导入时间（UTC）
     
     def __repr__(self):
-        return f'<JiuYanNews {self.news_date} {self.news_time}>'
\ No newline at end of file
+        return f'<ImportWatermark {self.source} {self.max_date}>'
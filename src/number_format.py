@@ -0,0 +1,68 @@
+"""
+数值解析与格式化
+
+数据库中的涨跌幅、净买入金额保存为数值（百分数、元），
+只在页面渲染时格式化为 "10.00%"、"3.93亿" 这样的文本。
+解析函数同时兼容旧CSV和旧数据库中的带单位字符串。
+"""
+
+# 金额单位换算
+AMOUNT_UNITS = {
+    '亿': 100000000,
+    '万': 10000,
+    '元': 1,
+}
+
+
+def parse_percent(value):
+    """解析涨跌幅，支持 "10.00%"、"10.0" 和数值，无法解析时返回None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().rstrip('%').strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_amount(value):
+    """解析金额为元，支持 "3.93亿"、"-1.20万"、"500.00元" 和数值，无法解析时返回None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(',', '')
+    if not text:
+        return None
+    multiplier = 1
+    unit = text[-1]
+    if unit in AMOUNT_UNITS:
+        multiplier = AMOUNT_UNITS[unit]
+        text = text[:-1]
+    try:
+        return float(text) * multiplier
+    except ValueError:
+        return None
+
+
+def format_percent(value):
+    """格式化涨跌幅，如 10.0 -> "10.00%" """
+    if value is None:
+        return '-'
+    return f"{value:.2f}%"
+
+
+def format_amount(value):
+    """格式化金额，如 393000000 -> "3.93亿" """
+    if value is None:
+        return '-'
+    if abs(value) >= 100000000:
+        return f"{value/100000000:.2f}亿"
+    elif abs(value) >= 10000:
+        return f"{value/10000:.2f}万"
+    else:
+        return f"{value:.2f}元"
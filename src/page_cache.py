@@ -0,0 +1,142 @@
+"""
+列表页渲染结果缓存
+
+数据只在导入时变化，列表页却每次都要查询 SQLite 并渲染 Jinja 模板。
+这里把渲染好的页面缓存在进程内的 LRU 中，键为 (路由, 查询参数, 表的导入版本)，
+命中时只读 table_stats 的一行，跳过查询和模板引擎。导入提交后版本号递增
+（无论导入来自哪个进程），旧条目不再命中，随后被 LRU 淘汰或过期。
+
+另外提供条件请求支持：ETag/Last-Modified 由表的导入版本（每次请求从 table_stats 按主键读取，
+其他进程的导入也能立即看到）和部署标识生成，浏览器或CDN轮询时数据未变即返回304，
+只读一行统计信息，不做查询或模板工作；
+部署新版本（例如修改了模板）后旧的 ETag 不再匹配，客户端会拿到新页面。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+
+from table_stats import table_version
+
+# 进程启动时间和部署标识（优先使用部署平台提供的提交哈希，没有时使用进程启动时间）
+PROCESS_STARTED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+BUILD_ID = (os.environ.get('BUILD_ID') or os.environ.get('RAILWAY_GIT_COMMIT_SHA')
+            or os.environ.get('VERCEL_GIT_COMMIT_SHA') or str(int(PROCESS_STARTED_AT.timestamp())))
+
+
+class PageCache:
+    """带容量上限和过期时间的LRU页面缓存"""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """读取缓存，过期或不存在时返回None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def cached(self, table_name):
+        """视图装饰器：按部署标识、路由、查询参数和表的导入版本缓存渲染结果
+
+        Args:
+            table_name: 页面数据所在的表名
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                return self._cached_view(view, table_name, args, kwargs)
+            return wrapper
+        return decorator
+
+    def _cached_view(self, view, table_name, args, kwargs):
+        if self.maxsize <= 0 or request.method != 'GET':
+            return view(*args, **kwargs)
+
+        generation, _ = table_version(table_name)
+        key = (
+            BUILD_ID,
+            request.endpoint,
+            tuple(sorted(request.args.items(multi=True))),
+            table_name,
+            generation,
+        )
+        body = self.get(key)
+        if body is not None:
+            return body
+
+        rv = view(*args, **kwargs)
+        # 只缓存渲染出的HTML字符串，重定向等响应对象直接返回
+        if isinstance(rv, str):
+            self.set(key, rv)
+        return rv
+
+
+def conditional_get(table_name):
+    """视图装饰器：按表的导入版本（table_stats 中的持久化版本）支持 If-None-Match / If-Modified-Since
+
+    Args:
+        table_name: 页面数据所在的表名
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            generation, last_import_at = table_version(table_name)
+            # 从未通过导入程序写入过的表没有可靠的版本信息，不做条件处理
+            if last_import_at is None:
+                return view(*args, **kwargs)
+
+            # 页面内容还取决于模板和代码，Last-Modified 不早于进程启动时间
+            last_modified = max(last_import_at.replace(microsecond=0, tzinfo=timezone.utc), PROCESS_STARTED_AT)
+            etag = f"{BUILD_ID}-{table_name}-{generation}-{int(last_modified.timestamp())}"
+
+            not_modified = False
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since is not None:
+                not_modified = last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            # 允许缓存，但每次使用前都要向服务器验证
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
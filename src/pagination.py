@@ -0,0 +1,215 @@
+"""
+列表页分页工具
+
+提供基于游标（keyset/seek）的分页：按排序键记录当前页首尾行的键值，
+下一页用 WHERE (键) < (上一页最后一行) 代替 OFFSET，翻到第N页的代价与第1页相同。
+游标以不透明的 base64 字符串交给模板使用。
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+
+def _encode_value(value):
+    """把键值转换为可JSON序列化的形式"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    """按列类型把游标中的值还原为Python对象"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values, direction):
+    """生成游标字符串
+
+    Args:
+        values: 排序键的值列表
+        direction: "n" 表示向后翻页，"p" 表示向前翻页
+    """
+    payload = json.dumps({"k": [_encode_value(v) for v in values], "d": direction},
+                         ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order_keys):
+    """解析游标字符串，返回 (键值列表, 方向)；游标无效时返回 (None, "n")"""
+    if not cursor:
+        return None, "n"
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        raw_values = payload["k"]
+        direction = payload.get("d", "n")
+        if len(raw_values) != len(order_keys) or direction not in ("n", "p"):
+            return None, "n"
+        values = [_decode_value(column, value) for (column, _), value in zip(order_keys, raw_values)]
+        return values, direction
+    except (ValueError, KeyError, TypeError):
+        return None, "n"
+
+
+def _seek_condition(order_keys, values, forward):
+    """构造 seek 条件
+
+    对于排序键 (a DESC, b ASC, c ASC)，向后翻页的条件展开为:
+        a < va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+    向前翻页时比较方向全部取反。
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order_keys):
+        equal_prefix = [order_keys[j][0] == values[j] for j in range(i)]
+        # 向后翻页时，降序列取更小的值；向前翻页时相反
+        if descending == forward:
+            step = column < values[i]
+        else:
+            step = column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+
+    # 冗余的首列范围条件，让SQLite可以用索引直接定位而不是从头扫描
+    first_column, first_descending = order_keys[0]
+    if first_descending == forward:
+        leading = first_column <= values[0]
+    else:
+        leading = first_column >= values[0]
+    return and_(leading, or_(*clauses))
+
+
+def _order_by(order_keys, forward):
+    """生成排序子句，向前翻页时整体反转"""
+    clauses = []
+    for column, descending in order_keys:
+        if descending == forward:
+            clauses.append(column.desc())
+        else:
+            clauses.append(column.asc())
+    return clauses
+
+
+def _row_key(item, order_keys):
+    """从ORM对象或Row中读取排序键的值"""
+    return [getattr(item, column.key) for column, _ in order_keys]
+
+
+class KeysetPagination:
+    """游标分页结果，供模板渲染上一页/下一页链接"""
+
+    is_keyset = True
+
+    def __init__(self, items, per_page, next_cursor, prev_cursor):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.has_next = next_cursor is not None
+        self.has_prev = prev_cursor is not None
+
+
+def keyset_paginate(query, order_keys, cursor=None, per_page=20):
+    """按游标分页查询
+
+    Args:
+        query: 未排序的查询对象
+        order_keys: [(列, 是否降序), ...]，最后一列必须唯一（通常为id）
+        cursor: 上一次返回的游标字符串，为空表示第一页
+        per_page: 每页条数
+
+    Returns:
+        KeysetPagination 对象
+    """
+    values, direction = decode_cursor(cursor, order_keys)
+    forward = direction == "n"
+
+    if values is not None:
+        query = query.filter(_seek_condition(order_keys, values, forward))
+
+    # 多取一条用于判断是否还有更多数据
+    rows = query.order_by(*_order_by(order_keys, forward)).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if not forward:
+        rows.reverse()
+
+    next_cursor = None
+    prev_cursor = None
+    if rows:
+        if forward:
+            if has_more:
+                next_cursor = encode_cursor(_row_key(rows[-1], order_keys), "n")
+            if values is not None:
+                prev_cursor = encode_cursor(_row_key(rows[0], order_keys), "p")
+        else:
+            if has_more:
+                prev_cursor = encode_cursor(_row_key(rows[0], order_keys), "p")
+            next_cursor = encode_cursor(_row_key(rows[-1], order_keys), "n")
+
+    return KeysetPagination(rows, per_page, next_cursor, prev_cursor)
+
+
+class Pagination:
+    """页码分页结果，总数由调用方提供，不再对每个页面执行 COUNT(*)
+
+    next_cursor/prev_cursor 为当前页首尾行的游标，上一页/下一页链接使用游标分页，
+    只有直接跳转页码时才执行 OFFSET。
+    """
+
+    is_keyset = False
+
+    def __init__(self, items, page, per_page, total, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.pages = (total + per_page - 1) // per_page if per_page else 0
+        self.has_prev = page > 1
+        self.has_next = page < self.pages
+        self.prev_num = page - 1 if self.has_prev else None
+        self.next_num = page + 1 if self.has_next else None
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=5, right_edge=2):
+        last = 0
+        for num in range(1, self.pages + 1):
+            if num <= left_edge or \
+               (num > self.page - left_current - 1 and num < self.page + right_current) or \
+               num > self.pages - right_edge:
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
+
+
+def offset_paginate(query, page, per_page, total, order_keys=None):
+    """按页码分页查询（已排序的查询），总数由调用方提供
+
+    提供 order_keys（与查询的排序一致）时同时生成当前页首尾行的游标。
+    """
+    page = max(page, 1)
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    next_cursor = None
+    prev_cursor = None
+    if order_keys and items:
+        if page * per_page < total:
+            next_cursor = encode_cursor(_row_key(items[-1], order_keys), "n")
+        if page > 1:
+            prev_cursor = encode_cursor(_row_key(items[0], order_keys), "p")
+    return Pagination(items, page, per_page, total, next_cursor, prev_cursor)
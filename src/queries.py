@@ -0,0 +1,109 @@
+"""
+常用统计查询
+
+这些查询直接在SQL中聚合，依赖模型中声明的索引，不需要把整表读入Python。
+"""
+
+from sqlalchemy import func, select
+
+from models import db, DragonTiger, Trader, DragonTigerTrader, TraderTrade, JiuYanNews, NewsStock
+
+
+def recent_lhb_dates(days, category=None):
+    """最近 days 个有龙虎榜数据的日期（从新到旧），指定类别时只统计该类别有数据的日期"""
+    stmt = (select(DragonTiger.date).distinct()
+            .order_by(DragonTiger.date.desc())
+            .limit(days))
+    if category is not None:
+        stmt = stmt.where(DragonTiger.category == category)
+    return db.session.execute(stmt).scalars().all()
+
+
+def top_net_buyers(days=20, limit=20, category='jm'):
+    """最近 days 个交易日内某个类别净买入金额合计最多的股票
+
+    同一只股票每天在游资、普通、机构榜中各有一条记录，不按类别过滤会重复累加；
+    category 为 None 时合计全部类别。
+
+    Returns:
+        [(股票代码, 股票名称, 净买入合计(元), 上榜次数), ...]
+    """
+    dates = recent_lhb_dates(days, category)
+    if not dates:
+        return []
+
+    total = func.sum(DragonTiger.net_buy_amount).label('total_net_buy')
+    stmt = (select(DragonTiger.stock_code,
+                   func.max(DragonTiger.stock_name).label('stock_name'),
+                   total,
+                   func.count(DragonTiger.id).label('appearances'))
+            .where(DragonTiger.date >= dates[-1])
+            .group_by(DragonTiger.stock_code)
+            .order_by(total.desc())
+            .limit(limit))
+    if category is not None:
+        stmt = stmt.where(DragonTiger.category == category)
+    return db.session.execute(stmt).all()
+
+
+def is_stock_code(value):
+    """判断是股票代码（6位数字）还是股票名称"""
+    return len(value) == 6 and value.isdigit()
+
+
+def news_ids_for_stock(stock):
+    """提到某只股票的新闻ID子查询，stock 可以是股票代码或名称"""
+    if is_stock_code(stock):
+        condition = NewsStock.stock_code == stock
+    else:
+        condition = NewsStock.stock_name == stock
+    return select(NewsStock.news_id).where(condition)
+
+
+def news_for_stock(stock, limit=50):
+    """按股票代码或名称查询相关新闻（从新到旧），通过 news_stock 索引完成"""
+    stmt = (select(JiuYanNews)
+            .where(JiuYanNews.id.in_(news_ids_for_stock(stock)))
+            .order_by(JiuYanNews.news_date.desc(), JiuYanNews.news_time.desc(), JiuYanNews.id.desc())
+            .limit(limit))
+    return db.session.execute(stmt).scalars().all()
+
+
+def dragontiger_ids_for_trader(name, date_from=None, date_to=None):
+    """某个买方上榜的龙虎榜记录ID子查询，按 (trader_id, date) 索引查找"""
+    stmt = (select(DragonTigerTrader.dragon_tiger_id)
+            .join(Trader, Trader.id == DragonTigerTrader.trader_id)
+            .where(Trader.name == name))
+    if date_from is not None:
+        stmt = stmt.where(DragonTigerTrader.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(DragonTigerTrader.date <= date_to)
+    return stmt
+
+
+def trader_dragontiger(name, date_from=None, date_to=None, category='jm'):
+    """查询某个买方在日期范围内某个类别的全部上榜记录（从新到旧），category 为 None 时包含全部类别"""
+    stmt = (select(DragonTiger)
+            .where(DragonTiger.id.in_(dragontiger_ids_for_trader(name, date_from, date_to)))
+            .order_by(DragonTiger.date.desc(), DragonTiger.rank.asc(), DragonTiger.id.asc()))
+    if category is not None:
+        stmt = stmt.where(DragonTiger.category == category)
+    return db.session.execute(stmt).scalars().all()
+
+
+def trader_trades_filter(name, date_from=None, date_to=None):
+    """某个游资的买卖明细过滤条件，按 (trader_id, date) 索引查找"""
+    condition = TraderTrade.trader_id.in_(select(Trader.id).where(Trader.name == name))
+    if date_from is not None:
+        condition = condition & (TraderTrade.date >= date_from)
+    if date_to is not None:
+        condition = condition & (TraderTrade.date <= date_to)
+    return condition
+
+
+def trader_trades(name, date_from=None, date_to=None):
+    """查询某个游资在日期范围内每只股票的买入、卖出金额（从新到旧），不需要请求接口"""
+    stmt = (select(TraderTrade)
+            .where(trader_trades_filter(name, date_from, date_to))
+            .order_by(TraderTrade.date.desc(), TraderTrade.net_buy_amount.desc(), TraderTrade.id.asc()))
+    return db.session.execute(stmt).scalars().all()
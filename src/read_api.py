@@ -0,0 +1,210 @@
+"""
+只读数据接口
+
+/api/dragontiger、/api/trader_trades、/api/jiuyan_news、/api/quant、/api/wencai 以 NDJSON（默认）
+或 JSON 数组流式返回数据，支持 date_from/date_to/stock_code/stock_name 过滤、fields 列投影和 limit，
+/api/dragontiger 另外支持按买方名称（trader=欢乐海岸）和类别（category=jg）过滤，
+/api/trader_trades（游资买卖明细）另外支持按游资名称（trader=欢乐海岸）过滤。
+/api/dragontiger/top_net_buyers 按类别（category=jm，默认游资）统计净买入合计。
+结果直接从 SQLAlchemy 游标逐行读取并输出，不会在内存中构造 ORM 对象列表，
+可用于拉取跨越数月的数据。
+"""
+
+import json
+from datetime import date, datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import select
+
+from models import db, DragonTiger, TraderTrade, WenCai, QuantData, JiuYanNews, DRAGONTIGER_CATEGORIES
+from queries import top_net_buyers, news_ids_for_stock, dragontiger_ids_for_trader, trader_trades_filter
+
+read_api = Blueprint('read_api', __name__, url_prefix='/api')
+
+# 每次从游标读取的行数
+YIELD_PER = 1000
+
+# 数据集配置: 名称 -> (模型, 日期列, 排序子句)
+DATASETS = {
+    'dragontiger': (DragonTiger, DragonTiger.date,
+                    [DragonTiger.date.desc(), DragonTiger.rank.asc(), DragonTiger.id.asc()]),
+    'trader_trades': (TraderTrade, TraderTrade.date,
+                      [TraderTrade.date.desc(), TraderTrade.net_buy_amount.desc(), TraderTrade.id.asc()]),
+    'jiuyan_news': (JiuYanNews, JiuYanNews.news_date,
+                    [JiuYanNews.news_date.desc(), JiuYanNews.news_time.desc(), JiuYanNews.id.desc()]),
+    'quant': (QuantData, QuantData.date, [QuantData.date.desc(), QuantData.id.desc()]),
+    'wencai': (WenCai, WenCai.date, [WenCai.date.desc(), WenCai.id.desc()]),
+}
+
+
+class QueryError(ValueError):
+    """请求参数错误"""
+
+
+def _json_default(value):
+    """JSON序列化日期类型"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化类型: {type(value)}")
+
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise QueryError(f"{name} 日期格式错误，应为 YYYY-MM-DD: {value}")
+
+
+def _parse_category_arg(default=None):
+    """读取并检查 category 参数"""
+    category = request.args.get('category') or default
+    if category and category not in DRAGONTIGER_CATEGORIES:
+        raise QueryError(f"未知类别: {category}，可选类别: {', '.join(DRAGONTIGER_CATEGORIES)}")
+    return category
+
+
+def _select_columns(model):
+    """按 fields 参数选择要输出的列，未指定时输出全部列"""
+    columns = model.__table__.columns
+    fields = request.args.get('fields')
+    if not fields:
+        return list(columns)
+
+    selected = []
+    for name in fields.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in columns:
+            raise QueryError(f"未知字段: {name}，可选字段: {', '.join(columns.keys())}")
+        selected.append(columns[name])
+    if not selected:
+        raise QueryError("fields 参数为空")
+    return selected
+
+
+def _stock_filter(model, stock_code=None, stock_name=None):
+    """按股票代码或名称过滤的条件，新闻通过 news_stock 关联表过滤"""
+    if model is JiuYanNews:
+        return JiuYanNews.id.in_(news_ids_for_stock(stock_code or stock_name))
+    if stock_code:
+        return model.stock_code == stock_code
+    return model.stock_name == stock_name
+
+
+def build_statement(dataset):
+    """根据请求参数构造查询语句，返回 (语句, 列名列表)"""
+    model, date_column, order_by = DATASETS[dataset]
+    columns = _select_columns(model)
+    stmt = select(*columns)
+
+    date_from = _parse_date_arg('date_from')
+    date_to = _parse_date_arg('date_to')
+    if date_from is not None:
+        stmt = stmt.where(date_column >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(date_column <= date_to)
+
+    stock_code = request.args.get('stock_code')
+    if stock_code:
+        stmt = stmt.where(_stock_filter(model, stock_code=stock_code))
+    stock_name = request.args.get('stock_name')
+    if stock_name:
+        stmt = stmt.where(_stock_filter(model, stock_name=stock_name))
+
+    category = _parse_category_arg()
+    if category:
+        if model is not DragonTiger:
+            raise QueryError("category 参数只适用于龙虎榜数据")
+        stmt = stmt.where(DragonTiger.category == category)
+
+    trader = request.args.get('trader')
+    if trader:
+        if model is TraderTrade:
+            stmt = stmt.where(trader_trades_filter(trader))
+        elif model is DragonTiger:
+            stmt = stmt.where(DragonTiger.id.in_(dragontiger_ids_for_trader(trader, date_from, date_to)))
+        else:
+            raise QueryError("trader 参数只适用于龙虎榜数据和游资买卖明细")
+
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        if limit <= 0:
+            raise QueryError("limit 必须为正整数")
+        stmt = stmt.limit(limit)
+
+    return stmt.order_by(*order_by), [column.key for column in columns]
+
+
+def _iter_rows(stmt, names):
+    """逐行读取查询结果，转换为字典"""
+    result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    try:
+        for row in result:
+            yield dict(zip(names, row))
+    finally:
+        result.close()
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + '\n'
+
+
+def _json_array(rows):
+    yield '['
+    first = True
+    for row in rows:
+        if not first:
+            yield ','
+        first = False
+        yield json.dumps(row, ensure_ascii=False, default=_json_default)
+    yield ']\n'
+
+
+@read_api.route('/dragontiger/top_net_buyers')
+def dragontiger_top_net_buyers():
+    """最近N个交易日某个类别（默认游资）净买入合计最多的股票"""
+    days = request.args.get('days', 20, type=int)
+    limit = request.args.get('limit', 20, type=int)
+    if days <= 0 or limit <= 0:
+        return jsonify({'error': "days 和 limit 必须为正整数"}), 400
+    try:
+        category = _parse_category_arg(default='jm')
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = top_net_buyers(days=days, limit=limit, category=category)
+    return jsonify([
+        {
+            'stock_code': row.stock_code,
+            'stock_name': row.stock_name,
+            'total_net_buy': row.total_net_buy,
+            'appearances': row.appearances,
+        }
+        for row in rows
+    ])
+
+
+@read_api.route('/<dataset>')
+def export_dataset(dataset):
+    """流式导出数据集"""
+    if dataset not in DATASETS:
+        return jsonify({'error': f"未知数据集: {dataset}"}), 404
+
+    output_format = request.args.get('format', 'ndjson')
+    if output_format not in ('ndjson', 'json'):
+        return jsonify({'error': f"不支持的格式: {output_format}"}), 400
+
+    try:
+        stmt, names = build_statement(dataset)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = _iter_rows(stmt, names)
+    if output_format == 'json':
+        return Response(stream_with_context(_json_array(rows)), mimetype='application/json')
+    return Response(stream_with_context(_ndjson(rows)), mimetype='application/x-ndjson')
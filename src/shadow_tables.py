@@ -0,0 +1,95 @@
+"""
+影子表全量重新导入
+
+需要全量重新导入时（结构变化、某天数据损坏等），先把数据写入与正式表结构相同的影子表
+（如 dragon_tiger_shadow），写完后在一个短事务中删除正式表、把影子表改名为正式表。
+页面在整个导入过程中读到的都是完整的旧数据，替换提交后立即看到完整的新数据，
+不会出现空表或只导入了一半的表。
+
+影子表创建时只带唯一索引，供导入时的 upsert 使用；其余索引在写完数据、替换之前创建，
+替换事务中只有删除和改名，持有写锁的时间与表的大小无关。
+SQLite 不能给索引改名，索引名在整个数据库中唯一，所以影子表的索引使用正式表当前没有使用的名称:
+模型中声明的名称或加 _shadow 后缀的名称，两者交替使用（migrations 把两者视为同一个索引）。
+"""
+
+from sqlalchemy import Index, MetaData, inspect
+from sqlalchemy.schema import CreateTable
+
+from models import db
+from migrations import SHADOW_SUFFIX, begin_transaction
+
+
+def _shadow_name(name):
+    return name + SHADOW_SUFFIX
+
+
+class ShadowTables:
+    """一组需要一起替换的表（例如主表和它的关联表）"""
+
+    def __init__(self, models):
+        """
+        Args:
+            models: 模型类列表，被引用的表在前（如 [DragonTiger, DragonTigerTrader]）
+        """
+        self.originals = [model.__table__ for model in models]
+
+        # 影子表放在单独的 MetaData 中，不会被 db.create_all() 创建；
+        # 同时复制全部正式表，使影子表的外键仍然指向正式表名
+        metadata = MetaData()
+        for table in db.metadata.sorted_tables:
+            table.to_metadata(metadata)
+
+        inspector = inspect(db.engine)
+        self.shadows = {}
+        for table in self.originals:
+            in_use = set()
+            if inspector.has_table(table.name):
+                in_use = {index['name'] for index in inspector.get_indexes(table.name)}
+            shadow = table.to_metadata(metadata, name=_shadow_name(table.name))
+            shadow.indexes.clear()
+            for index in table.indexes:
+                name = _shadow_name(index.name) if index.name in in_use else index.name
+                Index(name, *[shadow.c[column.name] for column in index.columns], unique=index.unique)
+            self.shadows[table.name] = shadow
+
+    def __getitem__(self, model):
+        """模型对应的影子表"""
+        return self.shadows[model.__tablename__]
+
+    def create(self):
+        """创建空的影子表，只带唯一索引（上次中断遗留的影子表会先删除）"""
+        self.drop()
+        with db.engine.begin() as conn:
+            for table in self.originals:
+                shadow = self.shadows[table.name]
+                conn.execute(CreateTable(shadow))
+                for index in shadow.indexes:
+                    if index.unique:
+                        index.create(conn)
+
+    def create_secondary_indexes(self, conn):
+        """为写完数据的影子表创建其余索引，在替换之前调用"""
+        for table in self.originals:
+            for index in self.shadows[table.name].indexes:
+                if not index.unique:
+                    index.create(conn)
+
+    def drop(self):
+        """删除影子表"""
+        with db.engine.begin() as conn:
+            for table in reversed(self.originals):
+                self.shadows[table.name].drop(conn, checkfirst=True)
+
+    def swap(self, conn):
+        """用影子表替换正式表
+
+        conn 必须处于尚未开始事务的状态（例如 db.session.commit() 之后的 db.session.connection()），
+        替换在调用方提交时生效，调用方可以在同一事务中继续写入统计信息。
+        影子表的其余索引先在替换事务之外创建，替换事务中只删除正式表并给影子表改名。
+        """
+        self.create_secondary_indexes(conn)
+        begin_transaction(conn)
+        for table in reversed(self.originals):
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{table.name}"')
+        for table in self.originals:
+            conn.exec_driver_sql(f'ALTER TABLE "{self.shadows[table.name].name}" RENAME TO "{table.name}"')
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成测试数据
+
+按 天数 × 每天股票数 生成龙虎榜、i问财、量化和韭研公社新闻数据，
+文件格式与导入程序读取的格式相同，用于在接近真实规模的数据上测试导入和页面性能。
+
+用法:
+    python synthetic_data.py --days 250 --stocks 100 --output /tmp/synthetic
+    python synthetic_data.py --rows 1000000 --output /tmp/synthetic
+"""
+
+import csv
+import json
+import math
+import os
+import random
+from datetime import date, timedelta
+
+from lhb_pipeline import CSV_FIELDNAMES as DRAGONTIGER_FIELDNAMES
+
+# 输出文件名（与导入程序的默认文件名相同）
+DRAGONTIGER_CSV = "龙虎榜数据.csv"
+WENCAI_CSV = "i问财数据.csv"
+QUANT_CSV = "量化数据.csv"
+NEWS_JSON = "jiuyangongshe_news.json"
+NEWS_JSONL = "jiuyangongshe_news.jsonl"
+
+WENCAI_FIELDNAMES = ['date', 'stock_code', 'stock_name', 'indicator_name', 'indicator_value', 'industry', 'market']
+QUANT_FIELDNAMES = ['date', 'stock_code', 'stock_name', 'strategy_name', 'signal', 'confidence',
+                    'target_price', 'stop_loss', 'period']
+
+TRADERS = ["T王", "机构专用", "欢乐海岸", "章盟主", "炒股养家", "作手新一", "方新侠", "深股通专用", "沪股通专用"]
+INDICATORS = ["市盈率", "市净率", "净资产收益率", "毛利率", "净利润增长率", "营收增长率", "负债率", "现金流"]
+INDUSTRIES = ["金融", "房地产", "科技", "消费", "医药", "工业"]
+MARKETS = ["主板", "中小板", "创业板"]
+STRATEGIES = ["均线突破策略", "布林带策略", "MACD金叉策略", "RSI超卖策略", "动量策略"]
+
+
+class SyntheticData:
+    """按 天数 × 每天股票数 生成测试数据，相同参数和种子生成的数据相同"""
+
+    def __init__(self, days, stocks, start=date(2020, 1, 1), seed=42):
+        self.days = days
+        self.stocks = stocks
+        self.start = start
+        self.seed = seed
+        # 股票池是每天股票数的两倍，每天从中抽取不重复的股票
+        pool_size = max(stocks * 2, 100)
+        self.stock_pool = [(f"{600000 + i:06d}" if i % 2 else f"{i:06d}", f"测试股票{i}")
+                           for i in range(1, pool_size + 1)]
+        self.traders = TRADERS + [f"测试营业部{i}" for i in range(1, 200)]
+
+    @classmethod
+    def for_rows(cls, rows, stocks=100, **kwargs):
+        """每张表约 rows 行"""
+        stocks = min(stocks, rows)
+        return cls(days=max(1, math.ceil(rows / stocks)), stocks=stocks, **kwargs)
+
+    @property
+    def rows(self):
+        return self.days * self.stocks
+
+    def iter_days(self, salt):
+        """按天返回 (日期, 当天的股票列表, 随机数生成器)"""
+        rng = random.Random(f"{self.seed}-{salt}")
+        for offset in range(self.days):
+            yield self.start + timedelta(days=offset), rng.sample(self.stock_pool, self.stocks), rng
+
+    def dragontiger_rows(self):
+        for data_date, stocks, rng in self.iter_days('dragontiger'):
+            amounts = sorted((rng.uniform(-2e8, 5e8) for _ in stocks), reverse=True)
+            for rank, ((code, name), amount) in enumerate(zip(stocks, amounts), 1):
+                yield {
+                    'rank': rank,
+                    'stock_code': code,
+                    'stock_name': name,
+                    'buyers': ",".join(rng.sample(self.traders, rng.randint(1, 5))),
+                    'change_percent': round(rng.uniform(-10, 10), 2),
+                    'net_buy_amount': round(amount, 2),
+                    'date': data_date.isoformat(),
+                }
+
+    def wencai_rows(self):
+        for data_date, stocks, rng in self.iter_days('wencai'):
+            for code, name in stocks:
+                yield {
+                    'date': data_date.isoformat(),
+                    'stock_code': code,
+                    'stock_name': name,
+                    'indicator_name': rng.choice(INDICATORS),
+                    'indicator_value': round(rng.uniform(0, 100), 2),
+                    'industry': rng.choice(INDUSTRIES),
+                    'market': rng.choice(MARKETS),
+                }
+
+    def quant_rows(self):
+        for data_date, stocks, rng in self.iter_days('quant'):
+            for code, name in stocks:
+                yield {
+                    'date': data_date.isoformat(),
+                    'stock_code': code,
+                    'stock_name': name,
+                    'strategy_name': rng.choice(STRATEGIES),
+                    'signal': rng.choice(["买入", "卖出"]),
+                    'confidence': round(rng.uniform(0.6, 0.95), 2),
+                    'target_price': round(rng.uniform(10, 150), 2),
+                    'stop_loss': round(rng.uniform(5, 100), 2),
+                    'period': rng.randint(5, 30),
+                }
+
+    def news_items(self):
+        """韭研公社新闻，结构与爬虫输出相同"""
+        for data_date, stocks, rng in self.iter_days('news'):
+            for i, (code, name) in enumerate(stocks):
+                linked = [(code, name)] + rng.sample(stocks, rng.randint(0, 2))
+                content = f"{data_date} 第{i + 1}条测试新闻：{name}" + "公告内容" * rng.randint(5, 40)
+                yield {
+                    'title': f"{name}测试新闻{i + 1}",
+                    'publish_time': f"{data_date} {rng.randint(7, 22):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+                    'author': '测试作者',
+                    'content_preview': content,
+                    'stock_links': [{'name': n, 'code': c, 'url': ''} for c, n in dict.fromkeys(linked)],
+                    'stock_info': [],
+                }
+
+    def write_all(self, output_dir, news_format='json'):
+        """写出全部数据文件，返回 文件名 -> 路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {
+            DRAGONTIGER_CSV: write_csv(os.path.join(output_dir, DRAGONTIGER_CSV),
+                                       DRAGONTIGER_FIELDNAMES, self.dragontiger_rows()),
+            WENCAI_CSV: write_csv(os.path.join(output_dir, WENCAI_CSV), WENCAI_FIELDNAMES, self.wencai_rows()),
+            QUANT_CSV: write_csv(os.path.join(output_dir, QUANT_CSV), QUANT_FIELDNAMES, self.quant_rows()),
+        }
+        if news_format == 'jsonl':
+            paths[NEWS_JSONL] = write_jsonl(os.path.join(output_dir, NEWS_JSONL), self.news_items())
+        else:
+            paths[NEWS_JSON] = write_json_array(os.path.join(output_dir, NEWS_JSON), self.news_items())
+        return paths
+
+
+def write_csv(path, fieldnames, rows):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def write_json_array(path, items):
+    """逐条写出顶层数组格式的JSON文件，不在内存中构造整个列表"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i, item in enumerate(items):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(item, ensure_ascii=False))
+        f.write('\n]\n')
+    return path
+
+
+def write_jsonl(path, items):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return path
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='生成测试数据')
+    parser.add_argument('--days', type=int, default=250, help='天数')
+    parser.add_argument('--stocks', type=int, default=100, help='每天的股票数')
+    parser.add_argument('--rows', type=int, help='每张表的行数（指定时按 --stocks 计算天数）')
+    parser.add_argument('--output', default='synthetic_data', help='输出目录')
+    parser.add_argument('--news-format', choices=['json', 'jsonl'], default='json', help='新闻文件格式')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    if args.rows:
+        data = SyntheticData.for_rows(args.rows, args.stocks, seed=args.seed)
+    else:
+        data = SyntheticData(args.days, args.stocks, seed=args.seed)
+    paths = data.write_all(args.output, args.news_format)
+    print(f"已生成 {data.days} 天 × {data.stocks} 只股票（每张表 {data.rows} 行）的测试数据:")
+    for path in paths.values():
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+数据表统计信息
+
+列表页需要总行数来绘制页码，如果每次请求都执行 COUNT(*)，
+数据量大时会成为最慢的查询。这里改为由导入程序在写入数据的同一事务中
+刷新 table_stats 表，页面只需按主键读取一行。
+
+每张表的 (generation, 最近导入时间) 也保存在 table_stats 行中，随导入事务一起提交，
+页面缓存的键和条件请求的 ETag 都由它生成；每次请求都按主键读取，
+其他进程（命令行导入、其他 worker）的导入也能立即看到。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, TableStats
+
+
+def table_version(table_name):
+    """从 table_stats 表读取表的 (generation, last_import_at)，从未导入过时返回 (0, None)"""
+    row = db.session.execute(
+        select(TableStats.generation, TableStats.last_import_at).where(TableStats.table_name == table_name)
+    ).first()
+    return tuple(row) if row is not None else (0, None)
+
+
+def record_import(model):
+    """在当前事务中刷新表的行数统计，由调用方负责提交
+
+    Args:
+        model: 刚刚导入过数据的模型类
+    """
+    table_name = model.__tablename__
+    row_count = db.session.query(func.count(model.id)).scalar()
+
+    stats = db.session.get(TableStats, table_name)
+    if stats is None:
+        stats = TableStats(table_name=table_name, generation=0)
+        db.session.add(stats)
+    stats.row_count = row_count
+    stats.generation = (stats.generation or 0) + 1
+    stats.last_import_at = datetime.utcnow()
+    return stats
+
+
+def get_row_count(model):
+    """读取表的行数统计，统计行不存在时（旧数据库）计算一次并保存"""
+    table_name = model.__tablename__
+    stats = db.session.get(TableStats, table_name)
+    if stats is not None:
+        return stats.row_count
+
+    row_count = db.session.query(func.count(model.id)).scalar()
+    db.session.add(TableStats(table_name=table_name, row_count=row_count, generation=0))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 并发请求已经写入了统计行
+        db.session.rollback()
+    return row_count
@@ -0,0 +1,180 @@
+"""
+通达信龙虎榜接口的本地缓存
+
+已结算的历史日期的龙虎榜数据不会再变化，不需要每次都重新请求:
+- ProbeCache: 龙虎榜接口需要按 (类型, 排序) 参数组合逐个尝试才能知道某天是否有数据，
+  这里记录每个日期（或日期和类别）有数据的组合，已确认没有数据的不再请求
+- ResponseCache: 按请求参数的哈希把原始响应压缩保存到磁盘，已结算日期的响应永久有效，
+  其他请求（当天数据等）只在短时间内有效；解析程序修改后重新运行也不需要再请求网络
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from trading_calendar import latest_settled_lhb_date
+
+
+def _default_cache_dir():
+    """缓存所在目录: 环境变量 TDX_CACHE_DIR，默认为本模块所在目录（与当前工作目录无关）
+
+    模块目录不可写时（例如 Vercel 和只读容器）使用系统临时目录。
+    """
+    directory = os.environ.get('TDX_CACHE_DIR')
+    if directory:
+        return directory
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if os.access(directory, os.W_OK):
+        return directory
+    return os.path.join(tempfile.gettempdir(), 'stockweb_tdx_cache')
+
+
+CACHE_DIR = _default_cache_dir()
+PROBE_CACHE_FILE = os.path.join(CACHE_DIR, "tdx_probe_cache.json")
+RESPONSE_CACHE_DIR = os.path.join(CACHE_DIR, "tdx_response_cache")
+
+# 未结算日期（或不含日期）的响应的有效秒数
+RESPONSE_TTL = 300
+
+# 随机参数，每次请求都不同，不参与缓存键
+VOLATILE_PARAMS = ('_', 'rnd')
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def is_settled(date_str):
+    """该日期的龙虎榜是否已结算（之后不会再有新数据）"""
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    # 最近一个结算日的数据可能还在补充发布，只有更早的日期才算已结束
+    return day < latest_settled_lhb_date()
+
+
+class ProbeCache:
+    """每个日期的探测结果: 有数据的参数组合，或已确认没有数据（线程安全）
+
+    指定类别时按 (日期, 类别) 分别记录，用于分别获取各类别的数据。
+    """
+
+    def __init__(self, path=PROBE_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"读取探测缓存失败，重新开始记录: {e}")
+
+    @staticmethod
+    def _key(date_str, category):
+        return date_str if category is None else f"{date_str}:{category}"
+
+    def combinations(self, date_str, candidates, category=None):
+        """该日期要尝试的参数组合: 已知有数据的组合排在最前，已确认没有数据时返回空列表"""
+        with self.lock:
+            entry = self.entries.get(self._key(date_str, category))
+        if entry is None:
+            return list(candidates)
+        if entry.get('empty'):
+            return []
+        known = tuple(entry['combination'])
+        return [known] + [combination for combination in candidates if tuple(combination) != known]
+
+    def record_hit(self, date_str, combination, category=None):
+        """记录该日期有数据的参数组合"""
+        self._update(self._key(date_str, category), {'combination': list(combination)})
+
+    def record_empty(self, date_str, category=None):
+        """记录该日期所有组合都没有数据，只记录已结算的日期，未结算的日期之后还要再试"""
+        if is_settled(date_str):
+            self._update(self._key(date_str, category), {'empty': True})
+
+    def _update(self, key, entry):
+        with self.lock:
+            if self.entries.get(key) == entry:
+                return
+            self.entries[key] = entry
+            if not self.path:
+                return
+            # 先写临时文件再替换，中断时不会留下不完整的缓存文件；写入失败只影响缓存，不影响爬取
+            temp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"保存探测缓存失败: {e}")
+
+
+class ResponseCache:
+    """按请求参数的 sha256 保存的API原始响应（gzip压缩，线程安全）"""
+
+    def __init__(self, directory=RESPONSE_CACHE_DIR, ttl=RESPONSE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    @staticmethod
+    def key(request):
+        """请求参数（不含随机参数）的哈希"""
+        stable = {name: str(value) for name, value in request.items() if name not in VOLATILE_PARAMS}
+        return hashlib.sha256(json.dumps(stable, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        # 按哈希前两位分目录，避免单个目录文件过多
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+
+    @staticmethod
+    def is_permanent(request):
+        """请求中含有日期且都已结算时，响应不会再变化"""
+        dates = DATE_PATTERN.findall(" ".join(str(value) for value in request.values()))
+        try:
+            return bool(dates) and all(is_settled(date_str) for date_str in dates)
+        except ValueError:
+            return False
+
+    def get(self, request):
+        """返回缓存的响应文本，没有或已过期时返回None"""
+        if not self.directory:
+            return None
+        path = self.path(self.key(request))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"读取响应缓存失败，重新请求: {e}")
+            return None
+        if not entry.get('permanent') and time.time() - entry.get('fetched_at', 0) > self.ttl:
+            return None
+        return entry['response']
+
+    def put(self, request, response_text):
+        """保存响应，请求中的日期在请求时都已结算的响应永久有效"""
+        if not self.directory:
+            return
+        entry = {
+            'request': {name: value for name, value in request.items() if name not in VOLATILE_PARAMS},
+            'fetched_at': time.time(),
+            'permanent': self.is_permanent(request),
+            'response': response_text,
+        }
+        path = self.path(self.key(request))
+        # 先写临时文件再替换，并发写同一个键或中断时都不会留下不完整的文件；
+        # 写入失败（目录只读、磁盘已满等）只影响缓存，已经获取的响应照常返回
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"保存响应缓存失败: {e}")
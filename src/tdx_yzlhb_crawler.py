@@ -9,11 +9,18 @@ print("模块开始加载")
 
 import requests
 import json
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any, Optional
 import logging
 
+from tdx_cache import PROBE_CACHE_FILE, RESPONSE_CACHE_DIR, ProbeCache, ResponseCache
+from trading_calendar import is_trading_day, latest_settled_lhb_date, now_shanghai, previous_trading_day
+
 print("模块导入完成")
 
 # 配置日志
@@ -27,11 +34,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 请求频率限制: 平均每秒请求数、最多连续请求数
+REQUEST_RATE = 2.0
+REQUEST_BURST = 4
+# 同时获取的日期数
+MAX_WORKERS = 4
+
+# 获取龙虎榜数据时依次尝试的参数组合
+PARAM_COMBINATIONS = [
+    ("jm", "jmr"),  # 游资类型，按净买入排序
+    ("pt", "jmr"),  # 普通类型，按净买入排序
+    ("jg", "jmr"),  # 机构类型，按净买入排序
+    ("jm", "zdf"),  # 游资类型，按涨跌幅排序
+]
+
+# 龙虎榜类别: 游资、普通、机构
+CATEGORIES = ["jm", "pt", "jg"]
+
+# 响应中没有总条数时最多请求的页数（防止接口对超出范围的页码返回最后一页时无限翻页）
+MAX_PAGES = 50
+
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）: 平均每秒 rate 次，空闲后最多连续 capacity 次"""
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """取一个令牌，没有令牌时等待"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 
 class TDXYZLHBSpider:
     """同花顺游资龙虎榜爬虫"""
     
-    def __init__(self):
+    def __init__(self, rate: float = REQUEST_RATE, burst: int = REQUEST_BURST, max_workers: int = MAX_WORKERS,
+                 probe_cache_file: Optional[str] = PROBE_CACHE_FILE,
+                 response_cache_dir: Optional[str] = RESPONSE_CACHE_DIR):
         print("TDXYZLHBSpider.__init__开始执行")
         self.base_url = "http://page.tdx.com.cn:7615"
         self.api_url = f"{self.base_url}/tdx/Exec"
@@ -41,8 +94,32 @@ class TDXYZLHBSpider:
             'Referer': f'{self.base_url}/site/kggx/tk_yzlhb_yz.html',
             'Origin': self.base_url
         })
+        # 多个线程共用同一个会话，同时进行的请求数不超过 max_workers，
+        # 连接池大小与之一致，连接可以复用
+        self.max_workers = max(1, max_workers)
+        self.request_slots = threading.BoundedSemaphore(self.max_workers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 所有请求（无论来自哪个线程）共用一个限速器
+        self.rate_limiter = TokenBucket(rate, burst)
+        # 每个日期有数据的参数组合（probe_cache_file 为 None 时只在内存中记录）
+        self.probe_cache = ProbeCache(probe_cache_file)
+        # 成功的API响应保存到本地（response_cache_dir 为 None 时不缓存）
+        self.response_cache = ResponseCache(response_cache_dir)
         print("TDXYZLHBSpider.__init__执行完成")
     
+    def map_concurrent(self, func, items):
+        """并发对每一项（日期、页码等）调用 func，结果顺序与 items 相同
+        
+        可以嵌套调用（例如每个日期再并发请求各页），同时进行的请求数由 call_api 限制。
+        """
+        items = list(items)
+        if self.max_workers == 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(func, items))
+    
     def call_api(self, func_name: str, params: List[Any], reqtype: str = "cwserv") -> Optional[Dict[str, Any]]:
         """
         调用同花顺API
@@ -76,26 +153,35 @@ class TDXYZLHBSpider:
                 'timeout': 30000
             }
             
-            # 添加随机参数避免缓存
-            import random
-            data['_'] = str(int(time.time() * 1000))
-            data['rnd'] = str(random.randint(1000, 9999))
-            
-            logger.info(f"调用API: {func_name}, 参数: {params}")
-            
-            response = self.session.get(self.api_url, params=data, timeout=30)
-            response.raise_for_status()
-            
-            # 正确处理编码问题
-            try:
-                response_text = response.content.decode('utf-8')
-            except UnicodeDecodeError:
+            # 相同的请求先查本地响应缓存（按不含随机参数的请求参数查找）
+            response_text = self.response_cache.get(data)
+            from_cache = response_text is not None
+            if from_cache:
+                logger.info(f"使用缓存的API响应: {func_name}, 参数: {params}")
+            else:
+                # 添加随机参数避免缓存
+                import random
+                request_params = dict(data)
+                request_params['_'] = str(int(time.time() * 1000))
+                request_params['rnd'] = str(random.randint(1000, 9999))
+                
+                logger.info(f"调用API: {func_name}, 参数: {params}")
+                
+                self.rate_limiter.acquire()
+                with self.request_slots:
+                    response = self.session.get(self.api_url, params=request_params, timeout=30)
+                response.raise_for_status()
+                
+                # 正确处理编码问题
                 try:
-                    response_text = response.content.decode('gbk')
+                    response_text = response.content.decode('utf-8')
                 except UnicodeDecodeError:
-                    response_text = response.text
-            
-            print(f"API响应状态码: {response.status_code}")
+                    try:
+                        response_text = response.content.decode('gbk')
+                    except UnicodeDecodeError:
+                        response_text = response.text
+                
+                print(f"API响应状态码: {response.status_code}")
             print(f"API响应内容前500字符: {response_text[:500]}")
             
             # 解析响应
@@ -104,7 +190,9 @@ class TDXYZLHBSpider:
                 result = json.loads(json_str)
                 
                 if result.get("ErrorCode") == 0:
-                    logger.info(f"API调用成功")
+                    logger.info("API调用成功")
+                    if not from_cache:
+                        self.response_cache.put(data, response_text)
                     return result
                 else:
                     logger.error(f"API返回错误: {result.get('ErrorInfo', 'Unknown error')}")
@@ -116,7 +204,9 @@ class TDXYZLHBSpider:
                     print(f"直接解析JSON结果类型: {type(result)}")
                     print(f"直接解析JSON结果: {result}")
                     if result.get("ErrorCode") == 0:
-                        logger.info(f"API调用成功（无success前缀）")
+                        logger.info("API调用成功（无success前缀）")
+                        if not from_cache:
+                            self.response_cache.put(data, response_text)
                         return result
                     else:
                         logger.error(f"API返回错误: {result.get('ErrorInfo', 'Unknown error')}")
@@ -135,7 +225,8 @@ class TDXYZLHBSpider:
             logger.error(f"未知错误: {e}")
             return None
     
-    def get_yzlhb_data(self, date_str: Optional[str] = None, type_code: str = "jm", sort_field: str = "jmr") -> Optional[Dict[str, Any]]:
+    def get_yzlhb_data(self, date_str: Optional[str] = None, type_code: str = "jm", sort_field: str = "jmr",
+                       page: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
         """
         获取游资龙虎榜数据
         
@@ -143,20 +234,106 @@ class TDXYZLHBSpider:
             date_str: 日期字符串 (格式: YYYY-MM-DD)，默认为当天
             type_code: 类型代码 ("pt"-普通, "jm"-游资, "jg"-机构)
             sort_field: 排序字段 ("jmr"-净买入, "zdf"-涨跌幅等)
+            page: 页码，默认获取全部页
             
         Returns:
-            游资龙虎榜数据
+            游资龙虎榜数据，请求失败时返回None
         """
-        print(f"进入get_yzlhb_data方法，date_str: {date_str}, type_code: {type_code}, sort_field: {sort_field}")
+        print(f"进入get_yzlhb_data方法，date_str: {date_str}, type_code: {type_code}, sort_field: {sort_field}, page: {page}")
         if date_str is None:
             date_str = datetime.now().strftime("%Y-%m-%d")
             print(f"日期未指定，使用默认日期: {date_str}")
         
+        if page is not None:
+            rows, _ = self.get_yzlhb_page(date_str, type_code, sort_field, page)
+            return rows
+        
+        return self.fetch_all_pages(lambda p: self.get_yzlhb_page(date_str, type_code, sort_field, p),
+                                    f"{date_str} {type_code}")
+    
+    def fetch_all_pages(self, fetch_page, label: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取分页接口的全部数据
+        
+        Args:
+            fetch_page: 按页码获取一页的函数，返回 (数据, 总条数)，请求失败时数据为None
+            label: 日志中的说明
+            
+        Returns:
+            合并去重后的数据，第一页请求失败时返回None
+        """
+        first_page, total = fetch_page(1)
+        if not first_page:
+            return first_page
+        
+        page_size = len(first_page)
+        pages = [first_page]
+        if total is not None:
+            # 响应中有总条数时，其余各页一次并发请求
+            page_count = math.ceil(total / page_size)
+            print(f"共 {total} 条数据，每页 {page_size} 条，共 {page_count} 页")
+            pages += self.map_concurrent(lambda p: fetch_page(p)[0], range(2, page_count + 1))
+        else:
+            # 没有总条数时先请求第2页，之后每批并发请求的页数翻倍（不超过 max_workers），最多 MAX_PAGES 页。
+            # 出现空页、不满一页或没有新数据的页时结束，不再请求后面的批次（接口不支持分页时每页都返回
+            # 第一页的内容，对超出范围的页码可能返回最后一页）；请求失败的页记为None，继续请求后面的页。
+            # 批次从小到大增长，只有几页的数据不会一次请求 max_workers 个超出范围的页码
+            seen = {self._row_key(row) for row in first_page}
+            next_page = 2
+            batch_size = 1
+            last_page = False
+            while not last_page and next_page <= MAX_PAGES:
+                batch = range(next_page, min(next_page + batch_size, MAX_PAGES + 1))
+                next_page = batch.stop
+                batch_size = min(batch_size * 2, self.max_workers)
+                results = self.map_concurrent(lambda p: fetch_page(p)[0], batch)
+                if all(rows is None for rows in results):
+                    # 整批请求失败时无法判断后面是否还有数据，不再继续请求
+                    pages.extend(results)
+                    last_page = True
+                    break
+                for rows in results:
+                    if rows is None:
+                        pages.append(None)
+                        continue
+                    keys = {self._row_key(row) for row in rows}
+                    if not keys - seen:
+                        last_page = True
+                        break
+                    seen |= keys
+                    pages.append(rows)
+                    if len(rows) < page_size:
+                        last_page = True
+                        break
+            if not last_page:
+                logger.warning(f"{label} 已达到最大页数 {MAX_PAGES}，数据可能不完整")
+        
+        if any(rows is None for rows in pages):
+            logger.warning(f"{label} 部分分页请求失败，数据可能不完整")
+        
+        # 合并各页，去掉重复的行（翻页期间数据更新可能导致相邻页有重复）
+        all_rows = []
+        seen = set()
+        for rows in pages:
+            for row in rows or []:
+                key = self._row_key(row)
+                if key not in seen:
+                    seen.add(key)
+                    all_rows.append(row)
+        print(f"{label} 共获取 {len(all_rows)} 条数据（{len(pages)} 页）")
+        return all_rows
+    
+    def get_yzlhb_page(self, date_str: str, type_code: str, sort_field: str, page: int = 1):
+        """
+        获取游资龙虎榜的一页数据
+        
+        Returns:
+            (解析后的数据, 总条数)，请求失败时数据为None，响应中没有总条数时总条数为None
+        """
         # 调用游资龙虎榜接口
         # 参数: [类型, 日期, 排序方式, 页码]
         # 类型: "pt"-普通, "jm"-游资, "jg"-机构
-        # 尝试不同的参数组合
-        params = [type_code, date_str, sort_field, 1]  # 使用指定类型获取数据
+        params = [type_code, date_str, sort_field, page]
         print(f"准备调用API，参数: {params}")
         
         result = self.call_api("cfg_fx_yzlhb_lhb", params)
@@ -167,7 +344,7 @@ class TDXYZLHBSpider:
         # 检查result是否为None
         if result is None:
             print("call_api返回了None")
-            return None
+            return None, None
             
         # 检查result中是否有tables或ResultSets字段
         if "tables" in result:
@@ -176,11 +353,11 @@ class TDXYZLHBSpider:
             table_key = "ResultSets"
         else:
             print(f"result中没有tables或ResultSets字段，result的keys: {result.keys() if isinstance(result, dict) else 'N/A'}")
-            return None
+            return None, None
             
         if len(result[table_key]) == 0:
             print(f"{table_key}列表为空")
-            return None
+            return [], 0
             
         if result and table_key in result and len(result[table_key]) > 0:
                 table_data = result[table_key][0]
@@ -234,6 +411,7 @@ class TDXYZLHBSpider:
                                 "jmr": float(row[4]) if len(row) > 4 and row[4] else 0,  # 净买入
                                 "yzmc": row[5] if len(row) > 5 else "未知",  # 购买人
                                 "zdf": float(row[6]) if len(row) > 6 and row[6] else 0,  # 涨跌幅
+                                "lx": type_code,  # 类别（请求参数）
                             }
                             
                             parsed_rows.append(parsed_row)
@@ -250,33 +428,129 @@ class TDXYZLHBSpider:
                 logger.info(f"解析后数据行数: {len(parsed_rows)}")
                 if parsed_rows:
                     logger.info(f"解析后的第一条数据: {parsed_rows[0]}")
-                return parsed_rows
+                return parsed_rows, self._total_count(result[table_key])
         
         logger.warning(f"API返回数据格式异常: {result}")
+        return None, None
+    
+    @staticmethod
+    def _row_key(row: Dict[str, Any]) -> str:
+        """用于判断重复行的键（值可能是列表或字典，序列化为JSON字符串）"""
+        return json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    
+    @staticmethod
+    def _total_count(tables: List[Dict[str, Any]]) -> Optional[int]:
+        """从响应的表信息中读取总条数，没有时返回None"""
+        for table in tables:
+            if not isinstance(table, dict):
+                continue
+            for key in ("TotalCount", "totalcount", "Total", "total", "RecordCount", "recordcount"):
+                value = table.get(key)
+                if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+                    return int(value)
         return None
     
-    def get_yz_detail_data(self, date_str: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def probe_yzlhb_data(self, date_str: str, category: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
         """
-        获取游资详情数据
+        依次尝试各参数组合获取某一天的龙虎榜数据
+        
+        已知有数据的组合最先尝试，已结算且确认没有数据的日期不再请求。
+        
+        Args:
+            date_str: 日期字符串 (格式: YYYY-MM-DD)
+            category: 只获取该类别（按净买入排序），探测结果按日期和类别分别记录；默认尝试全部参数组合
+            
+        Returns:
+            解析后的数据，所有组合都没有数据时返回None
+        """
+        candidates = PARAM_COMBINATIONS if category is None else [(category, "jmr")]
+        combinations = self.probe_cache.combinations(date_str, candidates, category)
+        if not combinations:
+            print(f"  {date_str} {category or ''} 已确认没有龙虎榜数据，跳过")
+            return None
+        
+        all_empty = True
+        for type_code, sort_field in combinations:
+            print(f"  尝试参数组合: 类型={type_code}, 排序={sort_field}")
+            try:
+                temp_data = self.get_yzlhb_data(date_str, type_code, sort_field)
+            except Exception as e:
+                print(f"  ❌ 请求出错: {e}")
+                all_empty = False
+                # 继续尝试下一个参数组合
+                continue
+            
+            if temp_data:
+                print(f"  ✅ 成功获取到数据，共{len(temp_data)}条")
+                self.probe_cache.record_hit(date_str, (type_code, sort_field), category)
+                return temp_data
+            print("  ❌ 未获取到数据")
+            # None 表示请求失败或响应异常，不能确认没有数据
+            if temp_data is None:
+                all_empty = False
+        
+        if all_empty:
+            self.probe_cache.record_empty(date_str, category)
+        return None
+    
+    def get_yz_detail_data(self, date_str: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取游资详情数据（每个游资在每只上榜股票上的买入、卖出金额），与龙虎榜一样获取全部页
         
         Args:
             date_str: 日期字符串 (格式: YYYY-MM-DD)，默认为当天
             
         Returns:
-            游资详情数据
+            游资详情数据（yzmc、gpdm、gpmc、mrje、mcje、jmr 等字段），请求失败时返回None
         """
         if date_str is None:
             date_str = datetime.now().strftime("%Y-%m-%d")
         
-        # 调用游资详情接口
-        params = [date_str]
+        return self.fetch_all_pages(lambda p: self.get_yz_detail_page(date_str, p), f"{date_str} 游资详情")
+    
+    def get_yz_detail_page(self, date_str: str, page: int = 1):
+        """
+        获取游资详情的一页数据
+        
+        Returns:
+            (解析后的数据, 总条数)，请求失败时数据为None，响应中没有总条数时总条数为None
+        """
+        # 调用游资详情接口，第一页只传日期（与原来的请求相同），之后的页在参数末尾加页码；
+        # 接口不支持分页时返回与第一页相同的内容，由 fetch_all_pages 识别后停止翻页
+        params = [date_str] if page == 1 else [date_str, page]
         
         result = self.call_api("cfg_fx_yzlhb_yz", params)
         
-        if result and "tables" in result and len(result["tables"]) > 0:
-            return result["tables"][0].get("rows", [])
-        
-        return None
+        if result is None:
+            return None, None
+        tables = result.get("tables") or result.get("ResultSets")
+        if tables is None:
+            logger.warning(f"游资详情接口返回数据格式异常: {result}")
+            return None, None
+        if not tables:
+            return [], 0
+        
+        table_data = tables[0]
+        rows = table_data.get("Content", table_data.get("rows", []))
+        # 行可能是字典，也可能是按 ColName 排列的二维数组
+        col_names = [str(name).lower() for name in table_data.get("ColName", [])]
+        parsed_rows = []
+        for row in rows:
+            if isinstance(row, dict):
+                item = dict(row)
+            elif col_names:
+                item = dict(zip(col_names, row))
+            else:
+                logger.warning(f"游资详情数据没有列名，无法解析: {row}")
+                continue
+            has_net = item.get("jmr") not in (None, "")
+            for key in ("mrje", "mcje", "jmr"):
+                item[key] = _to_float(item.get(key))
+            if not has_net:
+                item["jmr"] = item["mrje"] - item["mcje"]
+            parsed_rows.append(item)
+        print(f"{date_str} 游资详情第 {page} 页 {len(parsed_rows)} 条")
+        return parsed_rows, self._total_count(tables)
     
     def parse_stock_data(self, raw_data: List[Dict]) -> List[Dict[str, Any]]:
         """
@@ -346,57 +620,43 @@ class TDXYZLHBSpider:
             "data": {}
         }
         
-        for i in range(days):
-            date = datetime.now() - timedelta(days=i)
-            date_str = date.strftime("%Y-%m-%d")
-            
-            logger.info(f"爬取 {date_str} 的数据...")
-            
-            # 获取游资龙虎榜数据，尝试不同的参数组合
-            stock_data = None
-            # 尝试不同的参数组合
-            test_cases = [
-                ("jm", "jmr"),  # 游资类型，按净买入排序
-                ("pt", "jmr"),  # 普通类型，按净买入排序
-                ("jg", "jmr"),  # 机构类型，按净买入排序
-                ("jm", "zdf"),  # 游资类型，按涨跌幅排序
-            ]
-            
-            print(f"在crawl_recent_data中尝试不同的参数组合，日期: {date_str}")
-            for type_code, sort_field in test_cases:
-                print(f"调用get_yzlhb_data({date_str}, {type_code}, {sort_field})")
-                stock_data = self.get_yzlhb_data(date_str, type_code, sort_field)
-                if stock_data and len(stock_data) > 0:
-                    logger.info(f"使用参数组合 类型={type_code}, 排序={sort_field} 获取到数据")
-                    break
-            
-            if stock_data:
-                parsed_stocks = self.parse_stock_data(stock_data)
-                result["data"][date_str] = {
-                    "stocks": parsed_stocks,
-                    "stock_count": len(parsed_stocks)
-                }
-            else:
-                result["data"][date_str] = {
-                    "stocks": [],
-                    "stock_count": 0
-                }
-            
-            # 获取游资详情数据
-            yz_data = self.get_yz_detail_data(date_str)
-            if yz_data:
-                parsed_yz = self.parse_yz_data(yz_data)
-                result["data"][date_str]["yz_details"] = parsed_yz
-                result["data"][date_str]["yz_count"] = len(parsed_yz)
-            else:
-                result["data"][date_str]["yz_details"] = []
-                result["data"][date_str]["yz_count"] = 0
-            
-            # 避免请求过于频繁
-            time.sleep(1)
+        # 各日期并发获取，请求频率由限速器控制，结果按日期从新到旧排列
+        date_strs = [(datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        for date_str, date_data in zip(date_strs, self.map_concurrent(self._crawl_date, date_strs)):
+            result["data"][date_str] = date_data
         
         return result
     
+    def _crawl_date(self, date_str: str) -> Dict[str, Any]:
+        """爬取一天的龙虎榜和游资详情数据"""
+        logger.info(f"爬取 {date_str} 的数据...")
+        
+        # 并发获取游资龙虎榜数据（按探测缓存尝试参数组合）和游资详情数据
+        stock_data, yz_data = self.map_concurrent(lambda fetch: fetch(date_str),
+                                                  [self.probe_yzlhb_data, self.get_yz_detail_data])
+        
+        if stock_data:
+            parsed_stocks = self.parse_stock_data(stock_data)
+            date_data = {
+                "stocks": parsed_stocks,
+                "stock_count": len(parsed_stocks)
+            }
+        else:
+            date_data = {
+                "stocks": [],
+                "stock_count": 0
+            }
+        
+        if yz_data:
+            parsed_yz = self.parse_yz_data(yz_data)
+            date_data["yz_details"] = parsed_yz
+            date_data["yz_count"] = len(parsed_yz)
+        else:
+            date_data["yz_details"] = []
+            date_data["yz_count"] = 0
+        
+        return date_data
+    
     def save_to_json(self, data: Dict[str, Any], filename: str = "tdx_yzlhb_data.json"):
         """
         保存数据到JSON文件
@@ -447,6 +707,14 @@ class TDXYZLHBSpider:
             print()
 
 
+def _to_float(value):
+    """接口返回的金额可能是数字或字符串，无法解析时为0"""
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
 def format_number(num):
     """格式化数字显示，将净买入金额转换为亿单位"""
     if num >= 100000000:  # 大于等于1亿
@@ -457,14 +725,111 @@ def format_number(num):
         return str(num)
 
 
+def fetch_lhb_for_date(spider, date_str):
+    """获取某一天的龙虎榜数据（见 TDXYZLHBSpider.probe_yzlhb_data），都没有数据时返回None"""
+    return spider.probe_yzlhb_data(date_str)
+
+
+def fetch_lhb_categories(spider, date_str):
+    """并发获取某一天全部类别的龙虎榜数据，合并为一个列表（每行的 lx 为类别），都没有数据时返回None
+
+    每个类别都经过探测缓存，已结算且确认没有数据的 (日期, 类别) 不再请求。
+    """
+    results = spider.map_concurrent(lambda category: spider.probe_yzlhb_data(date_str, category), CATEGORIES)
+    rows = []
+    for category, category_rows in zip(CATEGORIES, results):
+        print(f"  {date_str} 类别 {category}: {len(category_rows) if category_rows else 0} 条")
+        rows.extend(category_rows or [])
+    return rows or None
+
+
+def attach_yz_details(rows, details):
+    """按股票代码把游资详情（买入、卖出金额）挂到龙虎榜数据的 yz_details 字段，返回没有对应上榜股票的详情条数"""
+    by_code = {}
+    for item in details:
+        by_code.setdefault(str(item.get("gpdm", "")).strip(), []).append(item)
+    matched = set()
+    for row in rows:
+        code = str(row.get("gpdm", "")).strip()
+        row["yz_details"] = by_code.get(code, [])
+        if code in by_code:
+            matched.add(code)
+    return sum(len(items) for code, items in by_code.items() if code not in matched)
+
+
+def fetch_lhb_with_details(spider, date_str, fetch=fetch_lhb_for_date):
+    """并发获取某一天的龙虎榜数据和游资详情数据，按股票代码合并，没有龙虎榜数据时返回None
+
+    游资详情请求失败时龙虎榜数据照常返回，各行的 yz_details 为空列表。
+    """
+    rows, details = spider.map_concurrent(lambda task: task(),
+                                          [lambda: fetch(spider, date_str), lambda: spider.get_yz_detail_data(date_str)])
+    if not rows:
+        return None
+    if details is None:
+        print(f"  ⚠️ {date_str} 游资详情获取失败，只保存龙虎榜数据")
+        details = []
+    unmatched = attach_yz_details(rows, details)
+    if unmatched:
+        print(f"  {date_str} 有 {unmatched} 条游资详情没有对应的上榜股票")
+    return rows
+
+
+def fetch_recent_lhb(spider, days_to_fetch=1, force_today=False, max_attempt_days=30, all_categories=False):
+    """按交易日历获取最近 days_to_fetch 个有数据的交易日的龙虎榜数据
+    
+    从最近一个已发布完整数据的交易日开始往前请求，跳过周末和节假日。
+    某个交易日没有数据时（例如数据源延迟发布）继续往前查找。
+    
+    Args:
+        spider: TDXYZLHBSpider 实例
+        days_to_fetch: 要获取的天数
+        force_today: 当天是交易日但数据还未发布完整时，也先尝试获取当天数据
+        max_attempt_days: 最多往前查找的自然日天数（至少查找 days_to_fetch 个交易日）
+        all_categories: 获取全部类别（见 fetch_lhb_categories），否则只获取第一个有数据的参数组合
+        
+    Returns:
+        日期字符串 -> 原始数据列表 的字典，每行的 yz_details 为该股票的游资详情（见 fetch_lhb_with_details）
+    """
+    now = now_shanghai()
+    today = now.date()
+    latest = latest_settled_lhb_date(now)
+    earliest = today - timedelta(days=max_attempt_days)
+    
+    candidates = []
+    if force_today and latest != today and is_trading_day(today):
+        candidates.append(today)
+    day = latest
+    while day >= earliest or len(candidates) < days_to_fetch:
+        candidates.append(day)
+        day = previous_trading_day(day)
+    print(f"最近一个已发布龙虎榜的交易日: {latest}，最多尝试 {len(candidates)} 个交易日")
+    
+    # 每批并发请求还缺少的天数，某天没有数据时用更早的交易日补足；
+    # 请求频率由爬虫的限速器控制，结果按日期从新到旧排列
+    all_stock_data = {}
+    position = 0
+    while len(all_stock_data) < days_to_fetch and position < len(candidates):
+        batch = [day.strftime("%Y-%m-%d") for day in candidates[position:position + days_to_fetch - len(all_stock_data)]]
+        position += len(batch)
+        print(f"尝试获取日期: {', '.join(batch)}")
+        fetch = fetch_lhb_categories if all_categories else fetch_lhb_for_date
+        results = spider.map_concurrent(lambda d: fetch_lhb_with_details(spider, d, fetch), batch)
+        for current_date, temp_data in zip(batch, results):
+            if temp_data:
+                all_stock_data[current_date] = temp_data
+            else:
+                print(f"  ⚠️ {current_date} 所有参数组合均未获取到数据")
+    
+    return all_stock_data
+
+
 def main(days_to_fetch=1):
     """主函数 - 获取净买入前30的股票信息，自动查找最新可用数据
     
     Args:
         days_to_fetch: 要获取的天数，默认为1天(只获取最新的一天数据)
     """
-    import sys
-    import time
     import argparse
     
     # 解析命令行参数
@@ -473,112 +838,22 @@ def main(days_to_fetch=1):
                         help='要获取的天数，默认为1天')
     parser.add_argument('--force-today', action='store_true', 
                         help='强制尝试获取当天数据')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f'同时获取的日期数，默认为{MAX_WORKERS}')
+    parser.add_argument('--rate', type=float, default=REQUEST_RATE,
+                        help=f'每秒最多请求数，默认为{REQUEST_RATE}')
     args = parser.parse_args()
     days_to_fetch = max(1, min(30, args.days))  # 限制在1-30天范围内
     force_today = args.force_today
     
     print(f"=== 开始获取最近{days_to_fetch}天的龙虎榜数据 ===")
     
-    spider = TDXYZLHBSpider()
-    
-    # 获取日期
-    from datetime import datetime, timedelta
-    today = datetime.now()
-    today_str = today.strftime("%Y-%m-%d")
+    spider = TDXYZLHBSpider(rate=args.rate, max_workers=args.workers)
     
-    # 定义参数组合，用于尝试不同的数据获取方式
-    param_combinations = [
-        ("jm", "jmr"),  # 游资类型，按净买入排序
-        ("pt", "jmr"),  # 普通类型，按净买入排序
-        ("jg", "jmr"),  # 机构类型，按净买入排序
-        ("jm", "zdf"),  # 游资类型，按涨跌幅排序
-    ]
-    
-    # 最大尝试天数（往前查找最近的数据）
-    max_attempt_days = 30  # 增加到30天以覆盖更长的假期
-    all_stock_data = {}
-    success_days = 0
-    
-    # 优先尝试获取当天数据（工作日下午4点后通常有数据）
-    current_hour = today.hour
-    current_minute = today.minute
-    current_time = current_hour * 60 + current_minute
-    target_time = 16 * 60  # 下午4点
-    
-    # 如果是工作日且时间在下午4点后，或者强制获取当天数据，则首先尝试今天
-    is_weekday = today.weekday() < 5  # 0-4表示周一到周五
-    
-    # 修改逻辑：如果当前是工作日，无论时间都优先尝试获取当天数据
-    # 因为龙虎榜数据通常在交易日结束后就会更新
-    attempt_today_first = force_today or is_weekday
-    
-    if attempt_today_first:
-        print(f"优先尝试获取当天数据: {today_str}")
-        found_today = False
-        
-        # 尝试所有参数组合获取今天的数据
-        for type_code, sort_field in param_combinations:
-            print(f"  尝试参数组合: 类型={type_code}, 排序={sort_field}")
-            try:
-                temp_data = spider.get_yzlhb_data(today_str, type_code, sort_field)
-                
-                if temp_data is not None and len(temp_data) > 0:
-                    print(f"  ✅ 成功获取到当天数据，共{len(temp_data)}条")
-                    all_stock_data[today_str] = temp_data
-                    success_days += 1
-                    found_today = True
-                    break
-                else:
-                    print(f"  ❌ 未获取到当天数据")
-            except Exception as e:
-                print(f"  ❌ 获取当天数据出错: {e}")
-                # 继续尝试下一个参数组合
-        
-        if found_today:
-            print(f"  ✅ 成功获取当天龙虎榜数据")
-        else:
-            print(f"  ⚠️ 未能获取到当天数据，将尝试获取历史数据")
-    
-    # 如果当天数据未获取到或需要获取更多天数的数据，则从昨天开始往前查找
-    if success_days < days_to_fetch:
-        print(f"\n开始查找历史数据，还需获取{days_to_fetch - success_days}天的数据")
-        
-        for days_ago in range(1, max_attempt_days + 1):
-            if success_days >= days_to_fetch:
-                break
-                
-            current_date = (today - timedelta(days=days_ago)).strftime("%Y-%m-%d")
-            
-            # 跳过已经获取到的日期
-            if current_date in all_stock_data:
-                continue
-                
-            print(f"尝试获取日期: {current_date} (前{days_ago}天)")
-            
-            # 尝试所有参数组合
-            found_for_date = False
-            for type_code, sort_field in param_combinations:
-                print(f"  尝试参数组合: 类型={type_code}, 排序={sort_field}")
-                try:
-                    temp_data = spider.get_yzlhb_data(current_date, type_code, sort_field)
-                    
-                    if temp_data is not None and len(temp_data) > 0:
-                        print(f"  ✅ 成功获取到数据，共{len(temp_data)}条")
-                        all_stock_data[current_date] = temp_data
-                        success_days += 1
-                        found_for_date = True
-                        break
-                    else:
-                        print(f"  ❌ 未获取到数据")
-                except Exception as e:
-                    print(f"  ❌ 请求出错: {e}")
-                    # 继续尝试下一个参数组合
-            
-            if not found_for_date:
-                print(f"  ⚠️ 该日期所有参数组合均未获取到数据")
-            
-            # 避免请求过于频繁
-            time.sleep(1)
+    # 最大尝试天数（往前查找最近的数据），增加到30天以覆盖更长的假期
+    max_attempt_days = 30
+    all_stock_data = fetch_recent_lhb(spider, days_to_fetch, force_today, max_attempt_days)
+    success_days = len(all_stock_data)
     
     if all_stock_data:
         print(f"\n=== 成功获取到{success_days}天的龙虎榜数据 ===")
@@ -646,13 +921,13 @@ def main(days_to_fetch=1):
         }
         
         spider.save_to_json(result_data, "tdx_yzlhb_top30.json")
-        print(f"\n最新数据已保存到 tdx_yzlhb_top30.json")
+        print("\n最新数据已保存到 tdx_yzlhb_top30.json")
         
-        # 同时更新tdx_yzlhb_data.json文件
+        # 同时更新tdx_yzlhb_data.json文件（当天全部上榜股票）
         full_data = {
             "crawl_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "date": latest_date,
-            "data": latest_top_30,
+            "data": sorted_latest_stocks,
             "days_fetched": success_days
         }
         spider.save_to_json(full_data, "tdx_yzlhb_data.json")
@@ -668,7 +943,7 @@ def main(days_to_fetch=1):
             
             for date_str, stocks in all_stock_data.items():
                 sorted_stocks = sorted(stocks, key=lambda x: x.get('jmr', 0), reverse=True)
-                historical_data["data_by_date"][date_str] = sorted_stocks[:30]
+                historical_data["data_by_date"][date_str] = sorted_stocks
             
             spider.save_to_json(historical_data, f"tdx_yzlhb_history_{success_days}d.json")
             print(f"历史数据已保存到 tdx_yzlhb_history_{success_days}d.json")
@@ -0,0 +1,134 @@
+"""
+A股交易日历
+
+龙虎榜只在交易日收盘后发布。原来的爬虫按自然日往前逐天尝试，遇到周末和长假时
+每个休市日都要请求多个参数组合；这里根据交易所休市安排直接算出有数据的日期。
+
+所有时间都按上海时间（Asia/Shanghai）计算，与服务器所在时区无关。
+休市安排每年年底由交易所公布，需要在 HOLIDAYS 中补充下一年的数据；
+未收录的年份按周一到周五都是交易日处理。
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+    SHANGHAI_TZ = ZoneInfo("Asia/Shanghai")
+except Exception:
+    # 没有时区数据库时（例如未安装 tzdata 的 Windows）使用固定的 UTC+8，中国不实行夏令时
+    SHANGHAI_TZ = timezone(timedelta(hours=8), "Asia/Shanghai")
+
+# 交易时段
+MORNING_SESSION = (time(9, 30), time(11, 30))
+AFTERNOON_SESSION = (time(13, 0), time(15, 0))
+
+# 龙虎榜数据在收盘后陆续发布，此时间之后认为当天数据已完整
+LHB_SETTLE_TIME = time(17, 0)
+
+
+def _dates(*items):
+    """展开日期和日期区间 (开始, 结束)"""
+    result = set()
+    for item in items:
+        if isinstance(item, tuple):
+            start, end = item
+            while start <= end:
+                result.add(start)
+                start += timedelta(days=1)
+        else:
+            result.add(item)
+    return frozenset(result)
+
+
+# 沪深交易所休市日（周末本来就休市，调休上班的周末也不开市，区间中的周末不影响结果）
+HOLIDAYS = {
+    2024: _dates(
+        date(2024, 1, 1),                            # 元旦
+        (date(2024, 2, 9), date(2024, 2, 16)),       # 春节
+        (date(2024, 4, 4), date(2024, 4, 5)),        # 清明节
+        (date(2024, 5, 1), date(2024, 5, 3)),        # 劳动节
+        date(2024, 6, 10),                           # 端午节
+        (date(2024, 9, 16), date(2024, 9, 17)),      # 中秋节
+        (date(2024, 10, 1), date(2024, 10, 7)),      # 国庆节
+    ),
+    2025: _dates(
+        date(2025, 1, 1),                            # 元旦
+        (date(2025, 1, 28), date(2025, 2, 4)),       # 春节
+        date(2025, 4, 4),                            # 清明节
+        (date(2025, 5, 1), date(2025, 5, 5)),        # 劳动节
+        date(2025, 6, 2),                            # 端午节
+        (date(2025, 10, 1), date(2025, 10, 8)),      # 国庆节、中秋节
+    ),
+    2026: _dates(
+        (date(2026, 1, 1), date(2026, 1, 2)),        # 元旦
+        (date(2026, 2, 16), date(2026, 2, 23)),      # 春节
+        date(2026, 4, 6),                            # 清明节
+        (date(2026, 5, 1), date(2026, 5, 5)),        # 劳动节
+        date(2026, 6, 19),                           # 端午节
+        date(2026, 9, 25),                           # 中秋节
+        (date(2026, 10, 1), date(2026, 10, 7)),      # 国庆节
+    ),
+}
+
+
+def now_shanghai():
+    """当前上海时间"""
+    return datetime.now(SHANGHAI_TZ)
+
+
+def to_shanghai(moment):
+    """转换为上海时间，不带时区的时间按上海时间处理"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=SHANGHAI_TZ)
+    return moment.astimezone(SHANGHAI_TZ)
+
+
+def is_trading_day(day):
+    """是否为交易日"""
+    if isinstance(day, datetime):
+        day = to_shanghai(day).date()
+    return day.weekday() < 5 and day not in HOLIDAYS.get(day.year, ())
+
+
+def previous_trading_day(day):
+    """day 之前（不含 day）的最近一个交易日"""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def next_trading_day(day):
+    """day 之后（不含 day）的最近一个交易日"""
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def trading_days_back(end, count):
+    """截至 end（含）的最近 count 个交易日，从新到旧"""
+    days = []
+    day = end if is_trading_day(end) else previous_trading_day(end)
+    while len(days) < count:
+        days.append(day)
+        day = previous_trading_day(day)
+    return days
+
+
+def is_trading_session(moment=None):
+    """给定时间（默认当前）是否在交易时段内"""
+    moment = to_shanghai(moment) if moment else now_shanghai()
+    if not is_trading_day(moment.date()):
+        return False
+    current = moment.time()
+    return any(start <= current < end for start, end in (MORNING_SESSION, AFTERNOON_SESSION))
+
+
+def latest_settled_lhb_date(moment=None):
+    """给定时间（默认当前）已经发布完整龙虎榜数据的最近交易日"""
+    moment = to_shanghai(moment) if moment else now_shanghai()
+    today = moment.date()
+    if is_trading_day(today) and moment.time() >= LHB_SETTLE_TIME:
+        return today
+    return previous_trading_day(today)
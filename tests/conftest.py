@@ -0,0 +1,32 @@
+"""
+测试公共配置
+
+src 下的模块按脚本方式互相导入（import models、import pagination），这里把 src 加入导入路径。
+app 在导入时就会建表并执行结构升级，导入之前把数据库指向临时文件，不影响本地的 stock.db。
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+TEST_DB_DIR = tempfile.mkdtemp(prefix='stock-tests-')
+TEST_DB_PATH = os.path.join(TEST_DB_DIR, 'stock.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{TEST_DB_PATH}'
+
+
+@pytest.fixture
+def app_context():
+    """空数据库的应用上下文"""
+    from app import app
+    from models import db
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
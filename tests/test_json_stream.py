@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from json_stream import append_jsonl, compact_jsonl, first_existing, iter_json_records
+
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_iter_jsonl_skips_blank_lines(tmp_path):
+    path = write(tmp_path / 'news.jsonl', '{"a": 1}\n\n{"a": "中文"}\n')
+    assert list(iter_json_records(path)) == [{'a': 1}, {'a': '中文'}]
+
+
+def test_iter_jsonl_reports_bad_line(tmp_path):
+    path = write(tmp_path / 'news.jsonl', '{"a": 1}\n{"a": \n')
+    with pytest.raises(ValueError, match='第 2 行'):
+        list(iter_json_records(path))
+
+
+def test_iter_array_across_read_boundaries(tmp_path):
+    records = [{'id': i, 'text': '新闻' * i, 'nested': {'list': [i, ']', '{']}} for i in range(50)]
+    path = write(tmp_path / 'news.json', json.dumps(records, ensure_ascii=False, indent=2))
+    # 很小的读取块，元素和字符串会被切断在两次读取之间
+    assert list(iter_json_records(path, read_size=7)) == records
+
+
+def test_iter_empty_array(tmp_path):
+    path = write(tmp_path / 'news.json', '  [ ]  ')
+    assert list(iter_json_records(path)) == []
+
+
+def test_iter_truncated_array(tmp_path):
+    path = write(tmp_path / 'news.json', '[{"a": 1}, {"a": 2}')
+    with pytest.raises(ValueError):
+        list(iter_json_records(path))
+
+
+def test_first_existing(tmp_path):
+    jsonl = tmp_path / 'news.jsonl'
+    json_file = tmp_path / 'news.json'
+    assert first_existing([str(jsonl), str(json_file)]) == str(json_file)
+    write(jsonl, '')
+    assert first_existing([str(jsonl), str(json_file)]) == str(jsonl)
+
+
+def test_append_jsonl(tmp_path):
+    path = str(tmp_path / 'news.jsonl')
+    assert append_jsonl(path, [{'a': 1}]) == 1
+    assert append_jsonl(path, [{'a': 2}, {'a': 3}]) == 2
+    assert [record['a'] for record in iter_json_records(path)] == [1, 2, 3]
+
+
+def test_compact_jsonl(tmp_path):
+    path = str(tmp_path / 'news.jsonl')
+    archive = str(tmp_path / 'news.archive.jsonl')
+    append_jsonl(path, [
+        {'day': '2026-09-01', 'text': 'old'},
+        {'day': '2026-10-16', 'text': 'a'},
+        {'day': '2026-10-16', 'text': 'a'},
+        {'day': '2026-10-16', 'text': 'b'},
+    ])
+
+    result = compact_jsonl(path, key=lambda r: (r['day'], r['text']),
+                           keep=lambda r: r['day'] >= '2026-10-01', archive_path=archive)
+
+    assert result == (2, 1, 1)
+    assert list(iter_json_records(path)) == [{'day': '2026-10-16', 'text': 'a'},
+                                             {'day': '2026-10-16', 'text': 'b'}]
+    assert list(iter_json_records(archive)) == [{'day': '2026-09-01', 'text': 'old'}]
+    assert not (tmp_path / 'news.jsonl.tmp').exists()
+
+
+def test_compact_missing_file(tmp_path):
+    path = str(tmp_path / 'news.jsonl')
+    archive = str(tmp_path / 'news.archive.jsonl')
+    assert compact_jsonl(path, key=repr, keep=bool, archive_path=archive) == (0, 0, 0)
@@ -0,0 +1,109 @@
+"""在最初版本的数据库结构上执行结构升级"""
+
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect
+
+from conftest import TEST_DB_PATH
+
+# 最初版本 models.py 由 db.create_all() 生成的表（涨跌幅、净买入金额为文本，没有唯一键和关联表）
+BASELINE_SCHEMA = """
+CREATE TABLE dragon_tiger (
+    id INTEGER NOT NULL, rank INTEGER NOT NULL, date DATE NOT NULL,
+    stock_code VARCHAR(10) NOT NULL, stock_name VARCHAR(50) NOT NULL, buyers VARCHAR(200),
+    change_percent VARCHAR(20) NOT NULL, net_buy_amount VARCHAR(50) NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE jiu_yan_news (
+    id INTEGER NOT NULL, news_date DATE NOT NULL, news_time VARCHAR(10) NOT NULL,
+    stock_codes TEXT NOT NULL, stock_names TEXT NOT NULL, news_content TEXT NOT NULL,
+    news_summary VARCHAR(100) NOT NULL, created_at DATETIME,
+    PRIMARY KEY (id)
+);
+INSERT INTO dragon_tiger VALUES (1, 1, '2025-09-30', '600001', '甲', '游资A, 游资B', '10.00%', '3.93亿');
+INSERT INTO dragon_tiger VALUES (2, 2, '2025-09-30', '600002', '乙', '游资B', '-5.5%', '-1.20万');
+INSERT INTO dragon_tiger VALUES (3, 1, '2025-09-30', '600001', '甲', '游资A', '10.00%', '4.00亿');
+INSERT INTO jiu_yan_news VALUES (1, '2025-09-30', '12:02', '600001, 600002', '甲, 乙', '内容', '内容', NULL);
+INSERT INTO jiu_yan_news VALUES (2, '2025-09-30', '12:02', '600001', '甲', '内容', '内容', NULL);
+INSERT INTO jiu_yan_news VALUES (3, '2025-09-30', '13:00', '', '丙', '另一条', '另一条', NULL);
+"""
+
+
+@pytest.fixture
+def baseline_db():
+    """把测试数据库替换为最初版本结构的数据库文件"""
+    from app import app
+    from models import db
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(TEST_DB_PATH + suffix):
+                os.remove(TEST_DB_PATH + suffix)
+        conn = sqlite3.connect(TEST_DB_PATH)
+        conn.executescript(BASELINE_SCHEMA)
+        conn.close()
+        yield db
+        db.session.remove()
+        db.engine.dispose()
+
+
+def upgrade(db):
+    from migrations import upgrade_schema
+
+    db.create_all()
+    upgrade_schema()
+
+
+def test_upgrade_baseline(baseline_db):
+    from models import DragonTiger, DragonTigerTrader, JiuYanNews, NewsStock, Trader
+
+    db = baseline_db
+    upgrade(db)
+
+    rows = DragonTiger.query.order_by(DragonTiger.stock_code).all()
+    # 重复的 (日期, 股票代码, 类别) 只保留ID最大的一条，数值列已转换
+    assert [(row.id, row.category, row.change_percent, row.net_buy_amount) for row in rows] == [
+        (3, 'jm', 10.0, pytest.approx(400000000.0)),
+        (2, 'jm', -5.5, pytest.approx(-12000.0)),
+    ]
+
+    assert {trader.name for trader in Trader.query} == {'游资A', '游资B'}
+    links = DragonTigerTrader.query.order_by(DragonTigerTrader.dragon_tiger_id).all()
+    assert [(link.dragon_tiger_id, link.trader.name) for link in links] == [(2, '游资B'), (3, '游资A')]
+
+    news = JiuYanNews.query.order_by(JiuYanNews.id).all()
+    assert [item.id for item in news] == [2, 3]
+    assert all(item.content_hash for item in news)
+    assert {(link.news_id, link.stock_code, link.stock_name) for link in NewsStock.query} == {
+        (2, '600001', '甲'), (3, None, '丙')}
+
+    inspector = inspect(db.engine)
+    assert 'dragon_tiger_new' not in inspector.get_table_names()
+    # 替换表之后，关联表的外键仍指向 dragon_tiger
+    assert {fk['referred_table'] for fk in inspector.get_foreign_keys('dragon_tiger_trader')} == {
+        'dragon_tiger', 'trader'}
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= existing, table.name
+
+
+def test_upgrade_is_idempotent(baseline_db):
+    from migrations import (add_dragontiger_category, add_news_content_hash, backfill_dragontiger_traders,
+                            backfill_news_stock, convert_dragontiger_numeric, create_missing_indexes)
+    from models import DragonTigerTrader
+
+    db = baseline_db
+    upgrade(db)
+    link_count = DragonTigerTrader.query.count()
+
+    assert not convert_dragontiger_numeric()
+    assert not add_news_content_hash()
+    assert not add_dragontiger_category()
+    assert create_missing_indexes() == []
+    assert not backfill_news_stock()
+    assert not backfill_dragontiger_traders()
+    assert DragonTigerTrader.query.count() == link_count
@@ -0,0 +1,54 @@
+import pytest
+
+from number_format import format_amount, format_percent, parse_amount, parse_percent
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('10.00%', 10.0),
+    (' -3.5 % ', -3.5),
+    ('10.0', 10.0),
+    (7, 7.0),
+    (None, None),
+    ('', None),
+    ('abc', None),
+])
+def test_parse_percent(value, expected):
+    assert parse_percent(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('3.93亿', 393000000.0),
+    ('-1.20万', -12000.0),
+    ('500.00元', 500.0),
+    ('1,234.5', 1234.5),
+    (12.5, 12.5),
+    (None, None),
+    ('', None),
+    ('亿', None),
+])
+def test_parse_amount(value, expected):
+    result = parse_amount(value)
+    if expected is None:
+        assert result is None
+    else:
+        assert result == pytest.approx(expected)
+
+
+def test_format_percent():
+    assert format_percent(10) == '10.00%'
+    assert format_percent(None) == '-'
+
+
+@pytest.mark.parametrize('value, expected', [
+    (393000000, '3.93亿'),
+    (-12000, '-1.20万'),
+    (500, '500.00元'),
+    (None, '-'),
+])
+def test_format_amount(value, expected):
+    assert format_amount(value) == expected
+
+
+def test_round_trip():
+    for text in ('3.93亿', '-1.20万', '500.00元'):
+        assert format_amount(parse_amount(text)) == text
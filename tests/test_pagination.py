@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+from models import db, WenCai
+from pagination import Pagination, decode_cursor, encode_cursor, keyset_paginate, offset_paginate
+from table_stats import get_row_count, record_import, table_version
+
+ORDER = [(WenCai.date, True), (WenCai.id, True)]
+
+
+def add_rows(count):
+    for i in range(count):
+        db.session.add(WenCai(date=date(2026, 10, 1) + timedelta(days=i % 4), stock_code=f'{i:06d}',
+                              stock_name='股票', indicator_name='指标', indicator_value=i))
+    db.session.commit()
+
+
+def expected_ids():
+    return [row.id for row in WenCai.query.order_by(WenCai.date.desc(), WenCai.id.desc())]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor([date(2026, 10, 16), 42], 'p')
+    assert decode_cursor(cursor, ORDER) == ([date(2026, 10, 16), 42], 'p')
+
+
+def test_invalid_cursor():
+    assert decode_cursor('', ORDER) == (None, 'n')
+    assert decode_cursor('not-base64!', ORDER) == (None, 'n')
+    assert decode_cursor(encode_cursor([1], 'n'), ORDER) == (None, 'n')
+    assert decode_cursor(encode_cursor(['2026-10-16', 1], 'x'), ORDER) == (None, 'n')
+
+
+def test_pagination_page_numbers():
+    pagination = Pagination([], page=4, per_page=20, total=181)
+    assert pagination.pages == 10
+    assert (pagination.prev_num, pagination.next_num) == (3, 5)
+    assert list(pagination.iter_pages(left_edge=1, left_current=1, right_current=2, right_edge=1)) == \
+        [1, None, 3, 4, 5, None, 10]
+
+
+def test_keyset_walks_all_rows(app_context):
+    add_rows(23)
+    ids = expected_ids()
+
+    seen = []
+    cursor = None
+    pages = []
+    while True:
+        page = keyset_paginate(WenCai.query, ORDER, cursor, per_page=5)
+        pages.append(page)
+        seen += [row.id for row in page.items]
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == ids
+    assert not pages[0].has_prev
+
+    # 从最后一页向前翻页
+    back = keyset_paginate(WenCai.query, ORDER, pages[-1].prev_cursor, per_page=5)
+    assert [row.id for row in back.items] == [row.id for row in pages[-2].items]
+
+
+def test_offset_page_emits_cursors(app_context):
+    add_rows(12)
+    ids = expected_ids()
+    query = WenCai.query.order_by(WenCai.date.desc(), WenCai.id.desc())
+
+    page = offset_paginate(query, 2, 5, 12, ORDER)
+    assert [row.id for row in page.items] == ids[5:10]
+    following = keyset_paginate(WenCai.query, ORDER, page.next_cursor, per_page=5)
+    assert [row.id for row in following.items] == ids[10:]
+    previous = keyset_paginate(WenCai.query, ORDER, page.prev_cursor, per_page=5)
+    assert [row.id for row in previous.items] == ids[:5]
+
+    last = offset_paginate(query, 3, 5, 12, ORDER)
+    assert last.next_cursor is None
+
+
+def test_row_count_from_table_stats(app_context):
+    add_rows(3)
+    assert table_version('wen_cai') == (0, None)
+    # 统计行不存在时计算一次并保存
+    assert get_row_count(WenCai) == 3
+
+    add_rows(2)
+    assert get_row_count(WenCai) == 3
+    record_import(WenCai)
+    db.session.commit()
+    assert get_row_count(WenCai) == 5
+    generation, last_import_at = table_version('wen_cai')
+    assert generation == 1 and last_import_at is not None
@@ -0,0 +1,50 @@
+from datetime import date, datetime, timezone
+
+from trading_calendar import (is_trading_day, is_trading_session, latest_settled_lhb_date,
+                              next_trading_day, previous_trading_day, trading_days_back)
+
+
+def test_weekends_and_holidays():
+    assert is_trading_day(date(2026, 10, 16))       # 周五
+    assert not is_trading_day(date(2026, 10, 17))   # 周六
+    assert not is_trading_day(date(2026, 10, 1))    # 国庆节
+    assert not is_trading_day(date(2026, 10, 10))   # 调休上班的周六不开市
+
+
+def test_unknown_year_uses_weekdays():
+    assert is_trading_day(date(2030, 1, 1))
+    assert not is_trading_day(date(2030, 1, 5))
+
+
+def test_previous_and_next_across_holiday():
+    assert previous_trading_day(date(2026, 10, 8)) == date(2026, 9, 30)
+    assert next_trading_day(date(2026, 9, 30)) == date(2026, 10, 8)
+    assert previous_trading_day(date(2026, 10, 19)) == date(2026, 10, 16)
+
+
+def test_trading_days_back():
+    assert trading_days_back(date(2026, 10, 18), 3) == [
+        date(2026, 10, 16), date(2026, 10, 15), date(2026, 10, 14)]
+    assert trading_days_back(date(2026, 10, 9), 3) == [
+        date(2026, 10, 9), date(2026, 10, 8), date(2026, 9, 30)]
+
+
+def test_trading_session():
+    assert is_trading_session(datetime(2026, 10, 16, 10, 0))
+    assert not is_trading_session(datetime(2026, 10, 16, 12, 0))
+    assert not is_trading_session(datetime(2026, 10, 16, 15, 0))
+    assert not is_trading_session(datetime(2026, 10, 17, 10, 0))
+
+
+def test_latest_settled_lhb_date():
+    assert latest_settled_lhb_date(datetime(2026, 10, 16, 16, 59)) == date(2026, 10, 15)
+    assert latest_settled_lhb_date(datetime(2026, 10, 16, 17, 0)) == date(2026, 10, 16)
+    assert latest_settled_lhb_date(datetime(2026, 10, 18, 20, 0)) == date(2026, 10, 16)
+
+
+def test_aware_times_use_shanghai():
+    # UTC 09:30 是上海时间 17:30
+    moment = datetime(2026, 10, 16, 9, 30, tzinfo=timezone.utc)
+    assert latest_settled_lhb_date(moment) == date(2026, 10, 16)
+    # UTC 周五 18:00 在上海已经是周六
+    assert not is_trading_day(datetime(2026, 10, 16, 18, 0, tzinfo=timezone.utc))